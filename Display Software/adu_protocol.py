@@ -0,0 +1,276 @@
+# IboSoft EFIS Display Software
+# Binary ADU frame format
+#   Packet: type (u8), sequence (u16), every field of fieldTags struct packed in table order,
+#   CRC-16/CCITT-FALSE (u16) of everything before it. Little endian. On the wire each packet is COBS
+#   encoded and ends with a 0x00 byte, so after any error the receiver resyncs at the next 0x00.
+#   A full frame is 119 bytes on the wire against ~410 for the ASCII dataOut() frame.
+#   Delta mode: a keyframe (full frame) every keyframe_interval frames and on request ('!kfr=1'); the
+#   frames in between carry a u64 field mask after the sequence number and only the fields that
+#   changed beyond their deadband, in table order. The receiver merges them into its last state.
+
+# Libraries
+import binascii                 # Internal
+import struct                   # Internal
+from telemetry import Telemetry, fieldTags, allFieldsMask, to_bool
+
+# --------------------
+# Packet Layout
+
+packetTypeFull = 0x01     # Also the keyframe of delta mode
+packetTypeDelta = 0x02
+
+headerStruct = struct.Struct('<BH')     # type, sequence
+maskStruct = struct.Struct('<Q')        # Delta field mask, bit n = field n of fieldTags
+crcStruct = struct.Struct('<H')
+
+# Converter of the ASCII field table -> struct format
+fieldFormats = {to_bool: '?', int: 'I', float: 'f'}
+
+fieldNames = tuple(name for name, convert in fieldTags.values())
+fieldStruct = struct.Struct('<' + ''.join(fieldFormats[convert] for name, convert in fieldTags.values()))
+fieldGetters = tuple(getattr(Telemetry, name).__get__ for name in fieldNames)
+fieldSetters = tuple(getattr(Telemetry, name).__set__ for name in fieldNames)
+
+fieldFormatList = tuple(fieldFormats[convert] for name, convert in fieldTags.values())
+
+fullPacketSize = headerStruct.size + fieldStruct.size + crcStruct.size
+deltaPacketMinSize = headerStruct.size + maskStruct.size + crcStruct.size
+
+# Smallest change sent in delta mode, about the resolution of the ASCII frame. Fields not listed
+# (statuses, switches, interval) are sent on any change.
+fieldDeadbands = {
+    'set_altStg': 1.0,                                          # Pa
+    'aoa_angle': 0.01, 'temp_TATC': 0.05,                       # deg, C
+    'imu_ax': 0.001, 'imu_ay': 0.001, 'imu_az': 0.001,          # g
+    'imu_gx': 0.01, 'imu_gy': 0.01, 'imu_gz': 0.01,             # deg/s
+    'press_pressPa': 1.0, 'diff_pressPa': 0.1,                  # Pa
+    'drv_pitch': 0.01, 'drv_roll': 0.01, 'drv_turnRate': 0.01, 'drv_linearAcc': 0.001,
+    'drv_magUncorrHdg': 0.01, 'drv_magCorrHdg': 0.01,           # deg
+    'drv_pressAltFt': 0.5, 'drv_indAltFt': 0.5, 'drv_baroVspdFpm': 5.0,
+    'drv_kias': 0.05, 'drv_kcas': 0.05, 'drv_ktas': 0.05, 'drv_mach': 0.0005, 'drv_SATC': 0.05,
+}
+
+# Field mask -> (Struct of the present fields, their slot setters); masks repeat from frame to frame
+deltaLayouts = {}
+
+def delta_layout(mask):
+    layout = deltaLayouts.get(mask)
+    if layout is None:
+        if len(deltaLayouts) >= 1024:
+            deltaLayouts.clear()
+        indexes = [index for index in range(len(fieldNames)) if mask >> index & 1]
+        layout = (struct.Struct('<' + ''.join(fieldFormatList[index] for index in indexes)),
+                  tuple(fieldSetters[index] for index in indexes))
+        deltaLayouts[mask] = layout
+    return layout
+
+def crc16(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+# --------------------
+# COBS
+
+def cobs_encode(data):
+    out = bytearray()
+    pos = 0
+    end = len(data)
+    while True:
+        zero = data.find(0, pos, pos + 254)
+        if zero >= 0:
+            out.append(zero - pos + 1)
+            out += data[pos:zero]
+            pos = zero + 1
+            continue
+        block = data[pos:pos + 254]
+        out.append(len(block) + 1)
+        out += block
+        pos += len(block)
+        if len(block) < 254 or pos >= end:
+            return bytes(out)
+
+def cobs_decode(data):
+    out = bytearray()
+    pos = 0
+    end = len(data)
+    while pos < end:
+        code = data[pos]
+        if code == 0 or pos + code > end:
+            raise ValueError("Invalid COBS block")
+        out += data[pos + 1:pos + code]
+        pos += code
+        if code < 0xFF and pos < end:
+            out.append(0)
+    return out
+
+# --------------------
+# Reference Encoder
+#   What the MCU sends in binary mode. Used to feed the decoder through a virtual port.
+
+def encode_frame(record, sequence):
+    packet = bytearray(headerStruct.pack(packetTypeFull, sequence & 0xFFFF))
+    packet += fieldStruct.pack(*(get_slot(record) for get_slot in fieldGetters))
+    return finish_packet(packet)
+
+def finish_packet(packet):
+    packet += crcStruct.pack(crc16(packet))
+    return cobs_encode(packet) + b'\x00'
+
+# Delta mode encoder. Changes are measured against the value last sent, so slow drift below the
+# deadband is still sent once it adds up.
+class DeltaEncoder:
+    def __init__(self, keyframe_interval=10, deadbands=fieldDeadbands):
+        self.keyframe_interval = keyframe_interval  # frames, keyframe period
+        self.deadbands = tuple(deadbands.get(name, 0) for name in fieldNames)
+        self.keyframe_requested = False
+        self._sent = None           # Field values as last sent
+        self._sequence = 0
+        self._since_keyframe = 0
+
+    def request_keyframe(self):
+        self.keyframe_requested = True
+
+    def encode(self, record):
+        values = [get_slot(record) for get_slot in fieldGetters]
+        sequence = self._sequence
+        self._sequence = (sequence + 1) & 0xFFFF
+        self._since_keyframe += 1
+        if self._sent is None or self.keyframe_requested or self._since_keyframe >= self.keyframe_interval:
+            self._sent = values
+            self._since_keyframe = 0
+            self.keyframe_requested = False
+            return encode_frame(record, sequence)
+
+        sent = self._sent
+        mask = 0
+        changed = []
+        for index, (value, deadband) in enumerate(zip(values, self.deadbands)):
+            if value != sent[index] and abs(value - sent[index]) > deadband:
+                mask |= 1 << index
+                changed.append(value)
+                sent[index] = value
+        packet = bytearray(headerStruct.pack(packetTypeDelta, sequence))
+        packet += maskStruct.pack(mask)
+        packet += delta_layout(mask)[0].pack(*changed)
+        return finish_packet(packet)
+
+# --------------------
+# Binary Frame Decoder
+#   Same interface as FrameDecoder. frames() returns the decoded packets with a good CRC; parse()
+#   unpacks the fields with one unpack_from() straight into the record's slots. A delta packet only
+#   writes the fields it carries, the rest of the record keeps the merged state. Sequence gaps are
+#   counted in stats.lost_frames, bad packets in stats.bad_frames. After a gap, or deltas without a
+#   keyframe, need_keyframe is set until the next keyframe.
+
+class BinaryFrameDecoder:
+    def __init__(self, stats, max_buffer=4096):
+        self.stats = stats
+        self.max_buffer = max_buffer    # bytes, buffered data without a 0x00 is dropped above this
+        self.last_sequence = None
+        self.need_keyframe = False
+        self._have_keyframe = False
+        self._buffer = bytearray()
+
+    def reset(self):
+        del self._buffer[:]
+        self.last_sequence = None
+        self.need_keyframe = False
+        self._have_keyframe = False
+
+    def feed(self, data):
+        self._buffer += data
+
+    def frames(self):
+        buffer = self._buffer
+        frames = []
+        pos = 0
+        while True:
+            end = buffer.find(0, pos)
+            if end < 0:
+                break
+            packet = self._decode(memoryview(buffer)[pos:end]) if end > pos else None
+            if packet is not None:
+                frames.append(packet)
+            pos = end + 1
+
+        if pos > 0:
+            del buffer[:pos]
+        if len(buffer) > self.max_buffer:
+            self.stats.bad_frames += 1
+            del buffer[:]
+        self.stats.frames += len(frames)
+        return frames
+
+    # Returns the mask of the fields set, like parse_frame()
+    def parse(self, record, packet):
+        if packet[0] == packetTypeFull:
+            for set_slot, value in zip(fieldSetters, fieldStruct.unpack_from(packet, headerStruct.size)):
+                set_slot(record, value)
+            return allFieldsMask
+        mask = maskStruct.unpack_from(packet, headerStruct.size)[0]
+        values_struct, setters = delta_layout(mask)
+        for set_slot, value in zip(setters, values_struct.unpack_from(packet, deltaPacketMinSize - crcStruct.size)):
+            set_slot(record, value)
+        return mask & allFieldsMask
+
+    def _decode(self, data):
+        try:
+            packet = cobs_decode(data)
+        except ValueError:
+            self.stats.bad_frames += 1
+            return None
+        if len(packet) < headerStruct.size + crcStruct.size or crc16(memoryview(packet)[:-crcStruct.size]) != crcStruct.unpack_from(packet, len(packet) - crcStruct.size)[0]:
+            self.stats.bad_frames += 1
+            return None
+        packet_type, sequence = headerStruct.unpack_from(packet)
+        if packet_type == packetTypeFull:
+            size = fullPacketSize
+        elif packet_type == packetTypeDelta and len(packet) >= deltaPacketMinSize:
+            size = deltaPacketMinSize + delta_layout(maskStruct.unpack_from(packet, headerStruct.size)[0])[0].size
+        else:
+            size = None
+        if len(packet) != size:
+            self.stats.bad_frames += 1
+            return None
+
+        if self.last_sequence is not None:
+            lost = (sequence - self.last_sequence - 1) & 0xFFFF
+            if lost:
+                self.stats.lost_frames += lost
+                self.need_keyframe = True
+        self.last_sequence = sequence
+        if packet_type == packetTypeFull:
+            self._have_keyframe = True
+            self.need_keyframe = False
+        elif not self._have_keyframe:
+            self.need_keyframe = True
+        return packet
+
+# --------------------
+# Rate Table
+#   '!rat=' settings command: comma separated 'field:interval' pairs with the field's index in fieldTags
+#   (its bit in a field mask) and the send interval in ms, e.g. '!rat=20:20,21:20,7:1000'. Not the tag:
+#   '!asd' and '!atg' would end the command where the MCU splits the message at '!', and the tags do
+#   not stay apart without their prefix ('%prs', '$prs'). Interval 0 returns a field to the loop rate.
+#   Fields not in the table keep their current rate.
+
+fieldIndices = {name: index for index, name in enumerate(fieldNames)}
+fieldTagList = tuple(fieldTags)
+
+def format_rate_table(rates):
+    return ",".join(f"{fieldIndices[name]}:{round(interval * 1000)}" for name, interval in rates.items())
+
+# Returns {tag: interval (s)}; pairs that do not parse or name an unknown field are skipped
+def parse_rate_table(text):
+    rates = {}
+    for pair in text.split(','):
+        index, separator, interval = pair.strip().partition(':')
+        if not separator:
+            continue
+        try:
+            index = int(index)
+            if not 0 <= index < len(fieldTagList):
+                continue
+            rates[fieldTagList[index]] = int(interval) / 1000
+        except ValueError:
+            continue
+    return rates
@@ -0,0 +1,479 @@
+# IboSoft EFIS Display Software
+# Air Data Unit (ADU) simulator
+#   Stands in for the MCU on a serial link: dataOut() frames with the firmware's line order and
+#   decimals, '#' ... '+' settings messages with '!asd', '!atg', '!clk', the '!rat' rate table and the
+#   '!bin'/'!kfr' binary mode of adu_protocol. Air data is derived from a flight profile with the
+#   firmware's formulas, so the indicated altitude follows the altimeter setting like on the aircraft.
+#
+#   python adu_simulator.py [--transport pty|socket|port] [--port URL] [--rate HZ] [--profile NAME|FILE] [--check]
+#     pty       Linux pseudo terminal, its path is printed; set it as PORT_NUM in config.ini
+#     socket    TCP server on --port (default 5760); PORT_NUM: socket://localhost:5760
+#     port      Any pyserial port or URL given with --port (COM pair, loop://, rfc2217://...)
+#   --check sends every setting and a rate table of every field through the display's uplink and exits
+#   with 1 if the stand-in does not end up with them.
+
+# Libraries
+import argparse                 # Internal
+import bisect                   # Internal
+import json                     # Internal
+import math                     # Internal
+import os                       # Internal
+import socket                   # Internal
+import sys                      # Internal
+import threading                # Internal
+import time                     # Internal
+from datetime import datetime, timezone   # Internal
+import serial                   # pyserial, external
+from telemetry import Telemetry, fieldTags
+from adu_protocol import DeltaEncoder, encode_frame, parse_rate_table
+
+# --------------------
+# Firmware Constants (variables.h)
+
+constStdP = 101325.0        # Pa
+constStdAirD = 1.225        # kg/m^3
+constR = 287.05287          # J/(kg*K)
+constRun = 8.31432          # J/(K*kmol)
+constKMinusC = 273.15
+constT0 = 288.15            # K
+constg0 = 9.80665           # m/s^2
+constM0 = 0.02896442        # kg/mol
+constLb = -0.0065           # K/m
+constYAir = 1.401
+constmtoft = 3.2808399
+constKtToMs = 0.514444444
+settingsBufferSize = 64     # Bytes, SETTINGS_BUFFER_SIZE; readSettings() wraps around and overwrites the start
+
+# --------------------
+# dataOut() line order and decimals (Serial.println(float) prints 2, None prints an integer)
+
+dataOutFormat = (
+    (b'!asd', None), (b'!atg', 2),
+    (b'$gn1', None), (b'$gn2', None), (b'$gn3', None),
+    (b'$aoa', 2),
+    (b'$tat', 2),
+    (b'%imu', None), (b'$ax', 3), (b'$ay', 3), (b'$az', 3), (b'$gx', 3), (b'$gy', 3), (b'$gz', 3),
+    (b'%mag', None),
+    (b'%prs', None), (b'$prs', 1),
+    (b'%dif', None), (b'$dif', 2),
+    (b'&pit', 2), (b'&rol', 2), (b'&trn', 2), (b'&lac', 3), (b'&umh', 2), (b'&cmh', 2),
+    (b'&plt', 2), (b'&ilt', 2), (b'&vsp', 2), (b'&ias', 2), (b'&cas', 2), (b'&tas', 2), (b'&mac', 4), (b'&sat', 2),
+)
+
+# Arduino Print::printFloat() output for values it cannot print
+def format_value(value, decimals):
+    if decimals is None:
+        return b'%d' % value
+    if math.isnan(value):
+        return b'nan'
+    if math.isinf(value):
+        return b'inf' if value > 0 else b'-inf'
+    if abs(value) > 4294967040.0:
+        return b'ovf'
+    return b'%.*f' % (decimals, value)
+
+# --------------------
+# Flight Profiles
+#   state(t) returns the flight state at t seconds: pitch, roll, heading (deg), ias (kt),
+#   alt (ft, pressure altitude), aoa (deg), oat (C), on_ground (bool).
+
+profileKeys = ('pitch', 'roll', 'heading', 'ias', 'alt', 'aoa', 'oat', 'on_ground')
+
+# Keyframes [{'t': s, key: value, ...}, ...] interpolated linearly, heading the short way round.
+# Keys missing from a keyframe keep the previous keyframe's value.
+class ScriptedProfile:
+    def __init__(self, keyframes, loop=True):
+        state = {'pitch': 0.0, 'roll': 0.0, 'heading': 0.0, 'ias': 0.0, 'alt': 0.0, 'aoa': 0.0, 'oat': 15.0, 'on_ground': True}
+        self.times = []
+        self.states = []
+        for keyframe in sorted(keyframes, key=lambda keyframe: keyframe['t']):
+            state = dict(state, **{key: keyframe[key] for key in profileKeys if key in keyframe})
+            self.times.append(float(keyframe['t']))
+            self.states.append(state)
+        self.loop = loop
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            script = json.load(file)
+        if isinstance(script, list):
+            return cls(script)
+        return cls(script['keyframes'], script.get('loop', True))
+
+    def state(self, t):
+        if self.loop and self.times[-1] > 0:
+            t %= self.times[-1]
+        index = bisect.bisect_right(self.times, t)
+        if index == 0:
+            return dict(self.states[0])
+        if index == len(self.times):
+            return dict(self.states[-1])
+        t0, t1 = self.times[index - 1], self.times[index]
+        a, b = self.states[index - 1], self.states[index]
+        k = (t - t0) / (t1 - t0)
+        state = {key: a[key] + (b[key] - a[key]) * k for key in ('pitch', 'roll', 'ias', 'alt', 'aoa', 'oat')}
+        state['heading'] = (a['heading'] + ((b['heading'] - a['heading'] + 180) % 360 - 180) * k) % 360
+        state['on_ground'] = a['on_ground']
+        return state
+
+# Left-hand traffic pattern at 1000 ft AGL from a field at 500 ft, runway 090: 5 min, repeats
+circuitKeyframes = [
+    {'t': 0, 'pitch': 0, 'roll': 0, 'heading': 90, 'ias': 0, 'alt': 500, 'aoa': 0, 'on_ground': True},
+    {'t': 20, 'ias': 55},
+    {'t': 22, 'pitch': 10, 'aoa': 8, 'on_ground': False},
+    {'t': 60, 'pitch': 8, 'ias': 70, 'alt': 1000, 'aoa': 6},
+    {'t': 64, 'roll': -20},
+    {'t': 80, 'roll': -20, 'heading': 0, 'alt': 1300},
+    {'t': 84, 'pitch': 2, 'roll': 0, 'ias': 95, 'alt': 1450, 'aoa': 3},
+    {'t': 100, 'heading': 0, 'alt': 1500},
+    {'t': 104, 'roll': -25},
+    {'t': 120, 'roll': -25, 'heading': 270},
+    {'t': 124, 'roll': 0},
+    {'t': 180, 'pitch': 2, 'heading': 270},
+    {'t': 184, 'pitch': -3, 'roll': -20, 'ias': 80, 'aoa': 4},
+    {'t': 200, 'roll': -20, 'heading': 180, 'alt': 1300},
+    {'t': 204, 'roll': -20},
+    {'t': 220, 'roll': -20, 'heading': 90, 'alt': 1000},
+    {'t': 224, 'roll': 0, 'ias': 65, 'aoa': 6},
+    {'t': 280, 'pitch': -3, 'alt': 520},
+    {'t': 284, 'pitch': 4, 'ias': 55, 'alt': 500, 'aoa': 9},
+    {'t': 286, 'pitch': 0, 'aoa': 0, 'on_ground': True},
+    {'t': 300, 'ias': 0},
+]
+
+# Everything moving all the time, for load tests of the display pipeline
+class ManoeuvreProfile:
+    def state(self, t):
+        return {
+            'pitch': 15 * math.sin(t / 7),
+            'roll': 45 * math.sin(t / 11),
+            'heading': (t * 6) % 360,
+            'ias': 110 + 40 * math.sin(t / 13),
+            'alt': 5000 + 4000 * math.sin(t / 60),
+            'aoa': 5 + 3 * math.sin(t / 7),
+            'oat': 15 - 2 * (5000 + 4000 * math.sin(t / 60)) / 1000,
+            'on_ground': False,
+        }
+
+def load_profile(name):
+    if name == 'circuit':
+        return ScriptedProfile(circuitKeyframes)
+    if name == 'manoeuvre':
+        return ManoeuvreProfile()
+    return ScriptedProfile.load(name)
+
+# --------------------
+# ADU Stand-in
+#   Holds the record the MCU would send. frame() gives the next frame with the fields that are due;
+#   receive() takes the display's settings messages like readSettings() does.
+
+class AduStandIn:
+    def __init__(self, record=None, loop_interval=0.1):
+        self.record = record if record is not None else Telemetry()  # Values to send
+        self.loop_interval = loop_interval      # s, dataOut() period of the MCU loop
+        self.rates = {}                         # Tag -> send interval (s) set by '!rat'
+        self.clock_offset = 0.0                 # s, RTC - system time, set by '!clk'
+        self.binary = 0                         # '!bin': 0 ASCII, 1 full frames, 2 delta frames
+        self.encoder = None
+        self._sequence = 0
+        self._next_times = {}                   # Tag -> time.monotonic() the field is due
+        self._last_frame_time = None
+        self._last_state = None                 # (t, state) for rates and the vertical speed
+        self._settings_buffer = bytearray(settingsBufferSize)
+        self._settings_index = 0
+        self._in_message = False
+
+    # Feeds bytes from the display. Like readSettings(): '#' starts a message, '+' processes it. A message
+    # longer than the buffer wraps around, only its tail is processed.
+    def receive(self, data):
+        for byte in data:
+            if byte == 0x23:    # '#'
+                self._settings_index = 0
+                self._in_message = True
+            elif byte == 0x2B:  # '+'
+                if self._in_message:
+                    self.process_settings(self._settings_buffer[:self._settings_index].decode('ascii', 'replace'))
+                self._settings_index = 0
+                self._in_message = False
+            elif self._in_message:
+                self._settings_buffer[self._settings_index] = byte
+                self._settings_index = (self._settings_index + 1) % settingsBufferSize
+
+    def process_settings(self, message):
+        for token in message.split('!'):
+            command, separator, value = token.strip().partition('=')
+            if not separator:
+                continue
+            try:
+                if command == 'asd':
+                    self.record.set_altStd = bool(int(value))
+                elif command == 'atg':
+                    self.record.set_altStg = float(value)
+                elif command == 'clk':
+                    rtc = datetime.strptime(value.strip(), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+                    self.clock_offset = rtc.timestamp() - time.time()
+                elif command == 'rat':
+                    for tag, interval in parse_rate_table(value).items():
+                        if interval:
+                            self.rates[tag] = interval
+                        else:
+                            self.rates.pop(tag, None)
+                        self._next_times.pop(tag, None)
+                elif command == 'bin':
+                    self.binary = int(value)
+                    self.encoder = DeltaEncoder() if self.binary == 2 else None
+                elif command == 'kfr':
+                    if self.encoder is not None:
+                        self.encoder.request_keyframe()
+            except ValueError:
+                pass
+
+    # Sets the sensor and derived values for a flight state, derived values with the firmware's formulas
+    def apply_state(self, state, t):
+        record = self.record
+        last_t, last_state = self._last_state if self._last_state is not None else (t, state)
+        dt = t - last_t
+        self._last_state = (t, state)
+
+        pitch, roll = state['pitch'], state['roll']
+        record.ag_onGnd1 = record.ag_onGnd2 = record.ag_onGnd3 = bool(state['on_ground'])
+        record.aoa_angle = state['aoa']
+        record.imuStatus = record.magStatus = record.pressStatus = record.diffStatus = True
+
+        # Pressure from pressure altitude (inverse of the firmware's pressure altitude)
+        record.press_pressPa = constStdP * (1 + constLb * state['alt'] / constmtoft / constT0) ** (-constg0 * constM0 / (constRun * constLb))
+        record.diff_pressPa = 0.5 * constStdAirD * (state['ias'] * constKtToMs) ** 2
+        oat = state.get('oat', 15.0 - 2.0 * state['alt'] / 1000)
+
+        # IMU
+        record.imu_ax = math.sin(math.radians(pitch))
+        record.imu_ay = 0.0
+        record.imu_az = math.cos(math.radians(pitch)) / max(0.2, math.cos(math.radians(roll)))
+        if dt > 0:
+            record.imu_gx = (roll - last_state['roll']) / dt
+            record.imu_gy = (pitch - last_state['pitch']) / dt
+            record.imu_gz = ((state['heading'] - last_state['heading'] + 180) % 360 - 180) / dt
+            record.drv_linearAcc = (state['ias'] - last_state['ias']) * constKtToMs / dt / constg0
+
+        # Derived values, as loop() computes them
+        p = record.press_pressPa
+        q = record.diff_pressPa
+        record.drv_pitch = pitch
+        record.drv_roll = roll
+        record.drv_magUncorrHdg = record.drv_magCorrHdg = state['heading'] % 360
+        previous_alt = record.drv_pressAltFt
+        record.drv_pressAltFt = (constT0 / constLb) * ((p / constStdP) ** ((-constRun * constLb) / (constg0 * constM0)) - 1.0) * constmtoft
+        if dt > 0:
+            record.drv_baroVspdFpm = 60.0 * (record.drv_pressAltFt - previous_alt) / dt
+        if record.set_altStd:
+            record.drv_indAltFt = record.drv_pressAltFt
+        else:
+            record.drv_indAltFt = (constT0 / constLb) * ((p / record.set_altStg) ** ((-constRun * constLb) / (constg0 * constM0)) - 1.0) * constmtoft
+        record.drv_kias = 1.943845249221964 * math.sqrt(((2 * constYAir * p) / ((constYAir - 1) * constStdAirD)) * (((p + q) / p) ** ((constYAir - 1.0) / constYAir) - 1.0))
+        record.drv_kcas = record.drv_kias
+        record.drv_mach = math.sqrt((2 / (constYAir - 1)) * (((q / p) + 1.0) ** ((constYAir - 1.0) / constYAir) - 1.0))
+        record.temp_TATC = (oat + constKMinusC) * ((constYAir - 1.0) / 2.0 * record.drv_mach ** 2 + 1.0) - constKMinusC
+        record.drv_SATC = (record.temp_TATC + constKMinusC) / (((constYAir - 1.0) / 2.0) * record.drv_mach ** 2 + 1.0) - constKMinusC
+        record.drv_ktas = 1.943845249221964 * math.sqrt((2 * q * constStdAirD) / (p / (constR * (record.drv_SATC + constKMinusC))))
+        tas = max(record.drv_ktas, 1.0)
+        record.drv_turnRate = 0.0 if state['on_ground'] else 1091 * math.tan(math.radians(roll)) / tas
+
+    # s until the next field is due, for sleeping between frames
+    def next_due(self, now):
+        if self.binary:
+            interval = min(self.loop_interval, *self.rates.values()) if self.rates else self.loop_interval
+            return max(0.0, (self._last_frame_time or now) + interval - now)
+        return max(0.0, min(self._next_times.values(), default=now) - now)
+
+    # Returns the frame due at 'now' or None: ASCII with the fields that are due, or a binary frame
+    def frame(self, now):
+        if self.binary:
+            if self.next_due(now) > 0:
+                return None
+            self._last_frame_time = now
+            self.record.messageInterval = round(self.loop_interval * 1000)
+            if self.encoder is not None:
+                return self.encoder.encode(self.record)
+            self._sequence += 1
+            return encode_frame(self.record, self._sequence)
+
+        lines = []
+        for tag, decimals in dataOutFormat:
+            next_time = self._next_times.get(tag, now)
+            if next_time > now:
+                continue
+            interval = self.rates.get(tag, self.loop_interval)
+            self._next_times[tag] = max(next_time + interval, now)
+            lines.append(tag + b'=' + format_value(getattr(self.record, fieldTags[tag][0]), decimals))
+        if not lines:
+            return None
+
+        elapsed = 0 if self._last_frame_time is None else round((now - self._last_frame_time) * 1000)
+        self._last_frame_time = now
+        rtc = datetime.fromtimestamp(time.time() + self.clock_offset, timezone.utc)
+        return b'\r\n'.join([b'#', b'/i=%d' % elapsed, rtc.strftime("@%Y-%m-%dT%H:%M:%SZ").encode('ascii'), *lines, b'+']) + b'\r\n'
+
+# --------------------
+# Transports
+#   Each returns (write(data), read() -> bytes, blocks up to ~0.1 s, close()).
+
+def open_pty():
+    import tty
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    print(f"ADU simulator on {os.ttyname(slave)}")
+    os.set_blocking(master, False)
+    import select
+
+    # Like the MCU's UART, output nobody reads is lost instead of blocking the loop
+    def write(data):
+        try:
+            os.write(master, data)
+        except BlockingIOError:
+            pass
+
+    def read():
+        ready, _, _ = select.select([master], [], [], 0.1)
+        try:
+            return os.read(master, 4096) if ready else b''
+        except BlockingIOError:
+            return b''
+    return write, read, (lambda: (os.close(master), os.close(slave)))
+
+def open_socket(port):
+    server = socket.create_server(('localhost', port))
+    print(f"ADU simulator on socket://localhost:{port}, waiting for the display...")
+    connection, address = server.accept()
+    server.close()
+    connection.settimeout(0.1)
+    connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def read():
+        try:
+            data = connection.recv(4096)
+        except socket.timeout:
+            return b''
+        if not data:
+            raise ConnectionError("Display disconnected")
+        return data
+    return connection.sendall, read, connection.close
+
+def open_port(url, baud_rate):
+    ser = serial.serial_for_url(url, baud_rate, timeout=0.1)
+    print(f"ADU simulator on {url}")
+    return ser.write, (lambda: ser.read(ser.in_waiting or 1)), ser.close
+
+# --------------------
+# Simulator
+#   Runs the stand-in on a transport: frames are written on schedule from the calling thread,
+#   the display's messages are read on a second thread.
+
+class AduSimulator:
+    def __init__(self, profile, rate=10.0, write=None, read=None):
+        self.profile = profile
+        self.adu = AduStandIn(loop_interval=1.0 / rate)
+        self.write = write
+        self.read = read
+        self.frames = 0
+        self.bytes = 0
+        self._lock = threading.Lock()           # Guards the stand-in between the two threads
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self, duration=None):
+        threading.Thread(target=self._receive, name="AduSimulatorRx", daemon=True).start()
+        self.write(b'Initialization Ok!\r\n')
+        start = time.monotonic()
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            with self._lock:
+                self.adu.apply_state(self.profile.state(now - start), now - start)
+                frame = self.adu.frame(now)
+                delay = self.adu.next_due(time.monotonic())
+            if frame is not None:
+                self.write(frame)
+                self.frames += 1
+                self.bytes += len(frame)
+            if delay > 0:
+                self._stop_event.wait(delay)
+
+    def _receive(self):
+        while not self._stop_event.is_set():
+            try:
+                data = self.read()
+            except (OSError, serial.SerialException, ConnectionError):
+                self._stop_event.set()
+                return
+            if data:
+                with self._lock:
+                    self.adu.receive(data)
+
+# --------------------
+# Uplink Check
+#   Settings and the rate table written by the display's SettingsUplink as received by the stand-in.
+#   Returns the mismatches.
+
+def check_uplink():
+    from serial_link import SettingsUplink
+    adu = AduStandIn()
+    uplink = SettingsUplink()
+    uplink.set('asd', True)
+    uplink.set('atg', 99000.0)
+    uplink.set_clock(datetime(2024, 4, 17, 18, 51, tzinfo=timezone.utc))
+    rates = {name: (index + 1) / 100 for index, (name, convert) in enumerate(fieldTags.values())}
+    uplink.send_rates(rates)
+    adu.receive(uplink.batch(adu.record, time.monotonic()))
+    errors = []
+    if adu.record.set_altStd is not True or adu.record.set_altStg != 99000.0:
+        errors.append(f"settings: asd {adu.record.set_altStd}, atg {adu.record.set_altStg}")
+    if abs(time.time() + adu.clock_offset - datetime(2024, 4, 17, 18, 51, tzinfo=timezone.utc).timestamp()) > 1:
+        errors.append(f"clock offset {adu.clock_offset:.0f} s")
+    received = {fieldTags[tag][0]: interval for tag, interval in adu.rates.items()}
+    for name, interval in rates.items():
+        if received.get(name) != interval:
+            errors.append(f"rate {name}: sent {interval}, received {received.get(name)}")
+    return errors
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="IboSoft EFIS ADU simulator")
+    parser.add_argument('--transport', choices=('pty', 'socket', 'port'), default='pty' if hasattr(os, 'openpty') else 'socket')
+    parser.add_argument('--port', help="TCP port for socket, pyserial port or URL for port")
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--rate', type=float, default=10.0, help="Frame rate, Hz (10 - 1000)")
+    parser.add_argument('--profile', default='circuit', help="circuit, manoeuvre or a JSON keyframe file")
+    parser.add_argument('--duration', type=float, help="s, run time (default: until interrupted)")
+    parser.add_argument('--check', action='store_true', help="Check the display's settings uplink and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        errors = check_uplink()
+        print("\n".join(errors) or "Uplink check passed")
+        sys.exit(1 if errors else 0)
+
+    if not 10 <= args.rate <= 1000:
+        parser.error("--rate must be between 10 and 1000 Hz")
+    if args.transport == 'pty':
+        write, read, close = open_pty()
+    elif args.transport == 'socket':
+        write, read, close = open_socket(int(args.port or 5760))
+    else:
+        if not args.port:
+            parser.error("--port is required with --transport port")
+        write, read, close = open_port(args.port, args.baud)
+
+    simulator = AduSimulator(load_profile(args.profile), args.rate, write, read)
+    start = time.monotonic()
+    try:
+        simulator.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        elapsed = time.monotonic() - start
+        print(f"{simulator.frames} frames, {simulator.bytes} bytes in {elapsed:.1f} s ({simulator.frames/elapsed:.1f} Hz)")
+        close()
+        sys.exit(0)
@@ -0,0 +1,136 @@
+# IboSoft EFIS Display Software
+# PFD render benchmark: time per instrument block over synthetic flight states, headless
+#   Flight states come from an adu_simulator profile through the firmware's formulas; 5% of the frames
+#   have the sensors failed so the flags are drawn too. Reports mean and p99 per block of PfdRenderer,
+#   the whole draw() and the flip, after a warm-up.
+#
+#   python bench_render.py [--frames N] [--profile NAME|FILE] [--step S] [--dirty] [--json FILE] [--baseline FILE]
+#     --dirty     Shows frames with dirty rectangle updates instead of flip, like the live display
+#     --json      Writes the results as a JSON baseline
+#     --baseline  Compares the results with a baseline written by --json
+
+# Libraries
+import argparse                 # Internal
+import json                     # Internal
+import os                       # Internal
+import platform                 # Internal
+import time                     # Internal
+import pygame                   # External
+from pfd_render import PfdRenderer, open_display, pfdSettingsDefaults
+from dirty_display import DirtyDisplay
+from adu_simulator import AduStandIn, load_profile
+
+# --------------------
+# Flight States
+
+def flight_states(profile, frame_count, step):
+    stand_in = AduStandIn()
+    states = []
+    for frame in range(frame_count):
+        t = frame * step
+        stand_in.apply_state(profile.state(t), t)
+        record = stand_in.record.copy()
+        record.messageInterval = 100
+        if frame % 100 >= 95:
+            record.imuStatus = record.magStatus = record.pressStatus = record.diffStatus = False
+            record.messageInterval = 250
+        states.append(record)
+    return states
+
+# --------------------
+# Benchmark
+
+# 'display': DirtyDisplay showing the frames, None: flip
+def run(renderer, states, settings, warmup, display=None):
+    samples = {name: [] for name in (*renderer.block_times, 'draw', 'flip')}
+    fractions = []
+    for frame, record in enumerate(states):
+        renderer.draw(record, settings)
+        start = time.perf_counter()
+        if display is not None:
+            display.update(renderer.dirty_rects())
+        else:
+            pygame.display.flip()
+        flip_time = time.perf_counter() - start
+        pygame.event.pump()
+        if frame < warmup:
+            continue
+        for name, block_time in renderer.block_times.items():
+            samples[name].append(block_time)
+        samples['draw'].append(renderer.frame_time)
+        samples['flip'].append(flip_time)
+        if display is not None:
+            fractions.append(display.fraction)
+    if fractions:
+        print(f"Screen updated {sum(fractions) / len(fractions) * 100:.1f}% per frame, {sum(fraction > display.threshold for fraction in fractions)} of {len(fractions)} frames flipped")
+    return samples
+
+# {name: {'mean_us': .., 'p99_us': .., 'max_us': ..}}
+def summarize(samples):
+    results = {}
+    for name, values in samples.items():
+        values = sorted(values)
+        results[name] = {
+            'mean_us': round(sum(values) / len(values) * 1e6, 1),
+            'p99_us': round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1e6, 1),
+            'max_us': round(values[-1] * 1e6, 1),
+        }
+    return results
+
+def print_results(results, baseline=None):
+    header = f"{'block':18s} {'mean us':>10s} {'p99 us':>10s} {'max us':>10s}"
+    if baseline is not None:
+        header += f" {'mean change':>12s} {'p99 change':>12s}"
+    print(header)
+    for name, result in results.items():
+        line = f"{name:18s} {result['mean_us']:10.1f} {result['p99_us']:10.1f} {result['max_us']:10.1f}"
+        base = baseline.get(name) if baseline is not None else None
+        if base is not None:
+            line += f" {change(result['mean_us'], base['mean_us']):>12s} {change(result['p99_us'], base['p99_us']):>12s}"
+        print(line)
+
+def change(value, base):
+    return f"{(value - base) / base * 100:+.1f}%" if base else "-"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="IboSoft EFIS PFD render benchmark")
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50, help="Frames not measured at the start")
+    parser.add_argument('--profile', default='manoeuvre', help="circuit, manoeuvre or a JSON keyframe file")
+    parser.add_argument('--step', type=float, default=0.25, help="s of flight per frame")
+    parser.add_argument('--dirty', action='store_true', help="Dirty rectangle updates instead of flip")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--baseline', help="Compare with a file written by --json")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))   # Images and fonts are relative
+    screen = open_display(headless=True)
+    renderer = PfdRenderer(screen)
+    display = DirtyDisplay(screen) if args.dirty else None
+    states = flight_states(load_profile(args.profile), args.frames + args.warmup, args.step)
+
+    start = time.monotonic()
+    results = summarize(run(renderer, states, pfdSettingsDefaults, args.warmup, display))
+    elapsed = time.monotonic() - start
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['blocks']
+    print(f"{args.frames} frames of '{args.profile}' in {elapsed:.1f} s, pygame {pygame.version.ver}, SDL {'.'.join(map(str, pygame.get_sdl_version()))}")
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({
+                'frames': args.frames,
+                'profile': args.profile,
+                'step': args.step,
+                'python': platform.python_version(),
+                'pygame': pygame.version.ver,
+                'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+                'machine': platform.machine(),
+                'blocks': results,
+            }, file, indent=2)
+        print("Baseline written to " + args.json)
+    pygame.quit()
@@ -0,0 +1,113 @@
+# IboSoft EFIS Display Software
+# Serial ingest microbenchmark: per-line readline() path vs. bulk read + FrameDecoder vs. binary full and delta frames
+#   python bench_serial.py [frame count]
+
+# Libraries
+import math                     # Internal
+import os                       # Internal
+import sys                      # Internal
+import threading                # Internal
+import time                     # Internal
+import serial                   # pyserial, external
+from serial_link import FrameDecoder, LinkStats
+from telemetry import Telemetry, parse_frame
+from adu_protocol import BinaryFrameDecoder, DeltaEncoder, encode_frame
+
+# --------------------
+# One dataOut() frame of the MCU, ~40 lines
+exampleFrame = (
+    "#\r\n/i=100\r\n@2024-04-17T18:51:00Z\r\n!asd=0\r\n!atg=101300.00\r\n"
+    "$gn1=1\r\n$gn2=1\r\n$gn3=1\r\n$aoa=2.35\r\n$tat=15.20\r\n"
+    "%imu=1\r\n$ax=0.012\r\n$ay=0.998\r\n$az=0.034\r\n$gx=0.125\r\n$gy=-0.250\r\n$gz=0.062\r\n"
+    "%mag=1\r\n%prs=1\r\n$prs=98745.3\r\n%dif=1\r\n$dif=1234.56\r\n"
+    "&pit=2.15\r\n&rol=-12.40\r\n&trn=1.52\r\n&lac=0.013\r\n&umh=123.45\r\n&cmh=124.10\r\n"
+    "&plt=2150.75\r\n&ilt=2010.30\r\n&vsp=450.00\r\n&ias=118.42\r\n&cas=118.42\r\n&tas=122.10\r\n"
+    "&mac=0.1801\r\n&sat=11.35\r\n+\r\n"
+).encode('ascii')
+
+# Virtual port fed by a writer thread. A pty exercises the real pyserial POSIX path; loop:// is used
+# where ptys are not available (Windows).
+def open_port(data):
+    if hasattr(os, 'openpty'):
+        import tty
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        ser = serial.Serial(os.ttyname(slave), timeout=1)
+        write = lambda chunk: os.write(master, chunk)
+    else:
+        ser = serial.serial_for_url('loop://', timeout=1)
+        write = ser.write
+
+    def writer():
+        for pos in range(0, len(data), 4096):
+            write(data[pos:pos + 4096])
+    threading.Thread(target=writer, daemon=True).start()
+    return ser
+
+def bench_readline(frame_count):
+    ser = open_port(exampleFrame * frame_count)
+    frames = 0
+    start_cpu = time.thread_time()
+    while frames < frame_count:
+        incoming_data = ser.readline().decode('ascii').strip()
+        if incoming_data == '+':
+            frames += 1
+    elapsed = time.thread_time() - start_cpu
+    ser.close()
+    return frames, elapsed
+
+# Decode and parse into a record, as the serial reader does
+def bench_decoder(frame_count):
+    return run_decoder(FrameDecoder(), exampleFrame * frame_count, frame_count)
+
+def bench_binary(frame_count):
+    record = Telemetry()
+    parse_frame(record, exampleFrame.split(b'\r\n')[1:-2], LinkStats())
+    data = b''.join(encode_frame(record, sequence) for sequence in range(frame_count))
+    return run_decoder(BinaryFrameDecoder(LinkStats()), data, frame_count)
+
+# Attitude, heading and air data moving every frame, everything else steady
+def bench_delta(frame_count):
+    record = Telemetry()
+    parse_frame(record, exampleFrame.split(b'\r\n')[1:-2], LinkStats())
+    encoder = DeltaEncoder()
+    chunks = []
+    for frame in range(frame_count):
+        record.drv_pitch = 5 * math.sin(frame / 20)
+        record.drv_roll = 30 * math.sin(frame / 30)
+        record.drv_turnRate = record.drv_roll / 10
+        record.drv_magUncorrHdg = record.drv_magCorrHdg = frame * 0.3 % 360
+        record.drv_indAltFt = 2000 + frame
+        record.drv_kias = 120 + math.sin(frame / 50)
+        chunks.append(encoder.encode(record))
+    data = b''.join(chunks)
+    print(f"Delta stream: {len(data)/frame_count:.1f} bytes/frame")
+    return run_decoder(BinaryFrameDecoder(LinkStats()), data, frame_count)
+
+def run_decoder(decoder, data, frame_count):
+    ser = open_port(data)
+    record = Telemetry()
+    frames = 0
+    start_cpu = time.thread_time()
+    while frames < frame_count:
+        decoder.feed(ser.read(ser.in_waiting or 1))
+        for frame in decoder.frames():
+            decoder.parse(record, frame)
+            frames += 1
+    elapsed = time.thread_time() - start_cpu
+    ser.close()
+    return frames, elapsed
+
+if __name__ == '__main__':
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"Frames: {frame_count}, ASCII {len(exampleFrame)} bytes, binary {len(encode_frame(Telemetry(), 0))} bytes each")
+    results = {}
+    for name, bench in (("readline().decode().strip()", bench_readline), ("read(in_waiting) + FrameDecoder", bench_decoder),
+                        ("read(in_waiting) + BinaryFrameDecoder", bench_binary), ("read(in_waiting) + delta frames", bench_delta)):
+        frames, elapsed = bench(frame_count)
+        results[name] = elapsed
+        print(f"{name:38s} {frames:6d} frames  {elapsed*1000:9.1f} ms  {elapsed/frames*1e6:8.1f} us/frame (reader thread CPU)")
+    base = results["readline().decode().strip()"]
+    for name, elapsed in list(results.items())[1:]:
+        print(f"Speedup {name}: {base/elapsed:.1f}x")
@@ -0,0 +1,107 @@
+# IboSoft EFIS Display Software
+# Compass rose
+#   The rose (disc and heading labels) is drawn once, heading 0 up, and rotated as a whole for the
+#   heading. Headings are quantized to 'step' degrees and the visible part of each rotated rose is kept
+#   in a least recently used cache of 'cache_size', so a steady or slowly changing heading is a single
+#   blit. 'step' 0 rotates the rose for the exact heading every frame.
+#   The ticks are drawn into each rotated rose as lines for its heading, not rotated with the bitmap:
+#   thin lines break up when rotated.
+
+# Libraries
+import collections              # Internal
+import math                     # Internal
+import pygame                   # External
+
+# --------------------
+# Rose
+
+class CompassRose:
+    # 'fonts' (small, large): labels of 10 and 30 degree multiples. 'clip' is the screen area that is ever
+    # visible, only that part of a rotated rose is kept.
+    def __init__(self, center, radius, short_tick, long_tick, tick_width, fonts, color, tick_color, clip,
+                 step=0.5, cache_size=64):
+        self.center = center
+        self.radius = radius                # px
+        self.short_tick = short_tick        # px
+        self.long_tick = long_tick          # px
+        self.tick_width = tick_width        # px
+        self.tick_color = tick_color
+        self.step = step                    # deg, 0: not quantized
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()  # Quantized heading -> (surface, screen position)
+        half = radius + 1
+        self.clip = pygame.Rect(clip).clip(pygame.Rect(center[0] - half, center[1] - half, 2*half + 1, 2*half + 1))
+        self.outline = self._outline()      # Outline of the visible part, relative to the center
+        self.rose = self._render(half, fonts, color)
+
+    # Blits the rose for 'heading' (deg); returns the rectangle drawn
+    def blit(self, dest, heading):
+        if self.step <= 0:
+            surface, pos = self._rotate(heading % 360)
+        else:
+            key = round(heading / self.step) % round(360 / self.step)
+            entry = self.cache.get(key)
+            if entry is None:
+                entry = self._rotate(key * self.step)
+                self.cache[key] = entry
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            else:
+                self.cache.move_to_end(key)
+            surface, pos = entry
+        return dest.blit(surface, pos)
+
+    # Visible part of the rose rotated for 'heading', ticks drawn in. Only the part of the rose that rotates
+    # into view is rotated, a fraction of the whole disc.
+    def _rotate(self, heading):
+        cos = math.cos(math.radians(heading))
+        sin = math.sin(math.radians(heading))
+        half = self.rose.get_width() // 2
+        points = [(x*cos - y*sin, x*sin + y*cos) for x, y in self.outline]     # Visible outline in the rose
+        left = math.floor(min(x for x, y in points)) - 2 + half
+        top = math.floor(min(y for x, y in points)) - 2 + half
+        source = pygame.Rect(left, top, math.ceil(max(x for x, y in points)) + 3 + half - left,
+                             math.ceil(max(y for x, y in points)) + 3 + half - top).clip(self.rose.get_rect())
+        x = source.centerx - half       # Source center relative to the rose center, where it is after the rotation
+        y = source.centery - half
+        rotated = pygame.transform.rotate(self.rose.subsurface(source), heading)
+        rect = rotated.get_rect(center=(self.center[0] + x*cos + y*sin, self.center[1] - x*sin + y*cos))
+        area = self.clip.clip(rect)
+        visible = rotated.subsurface(area.move(-rect.left, -rect.top)).copy()
+
+        center_x = self.center[0] - area.left
+        center_y = self.center[1] - area.top
+        radius = self.radius
+        for degree in range(0, 360, 10):
+            angle = math.radians(degree - heading - 90)
+            inner = radius - (self.long_tick if degree % 30 == 0 else self.short_tick)
+            pygame.draw.line(visible, self.tick_color, (center_x + inner*math.cos(angle), center_y + inner*math.sin(angle)),
+                             (center_x + radius*math.cos(angle), center_y + radius*math.sin(angle)), self.tick_width)
+        return visible, area.topleft
+
+    # Points on the outline of the disc inside 'clip': the clip border inside the disc and the circle inside the clip
+    def _outline(self):
+        center_x, center_y = self.center
+        radius = self.radius + 1
+        clip = self.clip
+        points = [(x, y) for x in range(clip.left, clip.right + 1, 4) for y in (clip.top, clip.bottom)]
+        points += [(x, y) for y in range(clip.top, clip.bottom + 1, 4) for x in (clip.left, clip.right)]
+        points += [(center_x + radius*math.cos(math.radians(angle/2)), center_y + radius*math.sin(math.radians(angle/2))) for angle in range(720)]
+        return [(x - center_x, y - center_y) for x, y in points
+                if (x - center_x)**2 + (y - center_y)**2 <= radius**2 + 1 and clip.left - 1 <= x <= clip.right + 1 and clip.top - 1 <= y <= clip.bottom + 1]
+
+    def _render(self, half, fonts, color):
+        size = 2*half + 1
+        rose = pygame.Surface((size, size))
+        if pygame.display.get_surface() is not None:
+            rose = rose.convert()
+        rose.set_colorkey((0, 0, 0))        # Outside the disc
+        center = (half, half)
+        pygame.draw.circle(rose, color, center, self.radius, 0)
+        text_radius = self.radius - self.long_tick - 10
+        for degree in range(0, 360, 10):
+            angle = math.radians(degree - 90)
+            font = fonts[1] if degree % 30 == 0 else fonts[0]
+            label = pygame.transform.rotozoom(font.render(str(degree // 10), True, self.tick_color), -degree, 1)
+            rose.blit(label, label.get_rect(center=(center[0] + text_radius*math.cos(angle), center[1] + text_radius*math.sin(angle))))
+        return rose
@@ -0,0 +1,99 @@
+# IboSoft EFIS Display Software
+# Dirty rectangle display updates
+#   DirtyDisplay shows a frame with pygame.display.update() of the rectangles that changed instead of
+#   flip(). The renderer works out which rectangles changed from the values its blocks draw (dirty_rects()),
+#   so frames drawn from unchanged data copy nothing and the frame itself is never read back. Above
+#   'threshold' of the screen the whole display is flipped. 'debug' outlines the updated rectangles.
+
+# Libraries
+import pygame                   # External
+
+# --------------------
+# Rectangles
+
+# Non-empty rectangles without the ones inside another. Overlapping ones are kept apart: their union
+# can be much larger, e.g. the tapes and the compass.
+def unique_rects(rects):
+    rects = sorted({tuple(rect) for rect in rects if rect[2] > 0 and rect[3] > 0}, key=lambda rect: -rect[2]*rect[3])
+    unique = []
+    for rect in map(pygame.Rect, rects):
+        if not any(other.contains(rect) for other in unique):
+            unique.append(rect)
+    return unique
+
+# Area (px) covered by 'rects', overlaps counted once: the covered height of each band between the
+# rectangles' left and right edges
+def covered_area(rects):
+    edges = sorted({x for rect in rects for x in (rect.left, rect.right)})
+    area = 0
+    for left, right in zip(edges, edges[1:]):
+        spans = sorted((rect.top, rect.bottom) for rect in rects if rect.left <= left and rect.right >= right)
+        height = 0
+        end = None
+        for top, bottom in spans:
+            if end is None or top > end:
+                height += bottom - top
+                end = bottom
+            elif bottom > end:
+                height += bottom - end
+                end = bottom
+        area += height * (right - left)
+    return area
+
+# Edges of 'rect' one pixel wide, without overlaps
+def outline_rects(rect):
+    return [pygame.Rect(rect.left, rect.top, rect.width, 1), pygame.Rect(rect.left, rect.bottom - 1, rect.width, 1),
+            pygame.Rect(rect.left, rect.top + 1, 1, rect.height - 2), pygame.Rect(rect.right - 1, rect.top + 1, 1, rect.height - 2)]
+
+# --------------------
+# Display
+
+class DirtyDisplay:
+    def __init__(self, surface, enabled=True, threshold=0.5, debug=False, debug_color=(255, 0, 255)):
+        self.surface = surface          # Display surface
+        self.enabled = enabled          # False: flip every frame
+        self.threshold = threshold      # Fraction of the screen above which the whole display is flipped
+        self.debug = debug
+        self.debug_color = debug_color
+        self.rect = surface.get_rect()
+        self.valid = False              # The display shows the last frame; False: flip the next one
+        self.forced = []                # Updated next time whatever they show: the debug outlines
+        self.updated = []               # Rectangles of the last update, None: flipped
+        self.fraction = 1.0             # Of the screen, last update
+
+    # The whole display is updated next time, e.g. after the window was exposed
+    def invalidate(self):
+        self.valid = False
+
+    # Shows the surface. 'rects' are the rectangles that may have changed since the last update.
+    # Returns the rectangles drawn on for the debug outlines, the renderer repaints them next frame.
+    def update(self, rects):
+        if not self.enabled:
+            pygame.display.flip()
+            self.updated = None
+            return []
+
+        if self.valid:
+            changed = unique_rects([pygame.Rect(rect).clip(self.rect) for rect in rects] + self.forced)
+            drawn = [rect for rect in changed if rect not in self.forced] if self.forced else changed
+        else:
+            changed = drawn = [self.rect]
+        self.valid = True
+        self.fraction = covered_area(changed) / (self.rect.width*self.rect.height)
+
+        # Outlines of the rectangles that changed, the old ones are updated away
+        outlines = []
+        if self.debug:
+            for rect in drawn:
+                pygame.draw.rect(self.surface, self.debug_color, rect, 1)
+                outlines += outline_rects(rect)
+        self.forced = outlines
+
+        if self.fraction > self.threshold:
+            pygame.display.flip()
+            self.updated = None
+        else:
+            if changed:
+                pygame.display.update(changed)
+            self.updated = changed
+        return outlines
@@ -0,0 +1,239 @@
+# IboSoft EFIS Display Software
+# Flight data recorder for the raw ADU stream
+#   Log file (.efr), append only:
+#     header    b'EFISREC1', wall clock and time.monotonic() at the start ('<8sdd')
+#     chunks    b'CHNK', compressed size, frame count, first/last receive time ('<4sIIdd'), zlib data
+#   Chunk data is a run of frames: receive time (time.monotonic()), kind (0 ASCII, 1 binary), size
+#   ('<dBI') and the frame bytes. ASCII frames are the lines between '#' and '+' joined with CR/LF, so
+#   the '@' RTC line of the MCU is kept as sent.
+#   Index file (.efr.idx), one entry per chunk: file offset, first frame number, frame count,
+#   first/last receive time and the first '@' RTC time (UNIX s, NaN if none) ('<QIIddd'). Seeking
+#   bisects the index and decompresses one chunk. A missing or short index is rebuilt from the chunk
+#   headers, a chunk cut short by a crash is ignored.
+
+# Libraries
+import bisect                   # Internal
+import collections              # Internal
+import logging                  # Internal
+import math                     # Internal
+import os                       # Internal
+import struct                   # Internal
+import threading                # Internal
+import time                     # Internal
+import zlib                     # Internal
+from datetime import datetime, timezone   # Internal
+
+# --------------------
+# File Layout
+
+fileMagic = b'EFISREC1'
+headerStruct = struct.Struct('<8sdd')       # magic, wall clock (UNIX s), time.monotonic() at start
+chunkMagic = b'CHNK'
+chunkStruct = struct.Struct('<4sIIdd')      # magic, compressed size, frame count, first time, last time
+frameStruct = struct.Struct('<dBI')         # receive time, kind, size
+indexStruct = struct.Struct('<QIIddd')      # offset, first frame, frame count, first time, last time, RTC
+
+frameKindAscii = 0
+frameKindBinary = 1
+
+def rtc_of(frame):
+    start = frame.find(b'@')
+    if start < 0 or (start > 0 and frame[start - 1] != 0x0A):
+        return math.nan
+    try:
+        return datetime.strptime(frame[start + 1:start + 21].decode('ascii'), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return math.nan
+
+# --------------------
+# Recorder
+#   record() is called by the serial reader and only appends to a deque; the recorder thread
+#   compresses and writes a chunk every chunk_interval or chunk_frames frames, so neither the reader
+#   nor the render loop waits on the disk.
+
+class FlightRecorder(threading.Thread):
+    def __init__(self, path, chunk_interval=1.0, chunk_frames=1000, compress_level=6):
+        super().__init__(name="FlightRecorder", daemon=True)
+        self.path = path
+        self.chunk_interval = chunk_interval    # s, longest time a frame waits in memory
+        self.chunk_frames = chunk_frames        # Frames per chunk at most
+        self.compress_level = compress_level
+        self.frames = 0                         # Frames written
+        self.bytes = 0                          # Compressed bytes written
+        self._pending = collections.deque()     # (receive time, protocol, [frames]) from record()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+        self._file = open(path, 'xb')           # Never overwrite a recording
+        self._index = open(path + '.idx', 'wb')
+        self._file.write(headerStruct.pack(fileMagic, time.time(), time.monotonic()))
+        self._file.flush()
+
+    # Called by the serial reader with the frames of one read
+    def record(self, receive_time, protocol, frames):
+        self._pending.append((receive_time, protocol, frames))
+        if len(self._pending) >= self.chunk_frames:
+            self._wake.set()
+
+    def close(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self._write_chunks()
+        self._file.close()
+        self._index.close()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self.chunk_interval)
+            self._wake.clear()
+            self._write_chunks()
+        self._write_chunks()
+
+    def _write_chunks(self):
+        while self._pending:
+            data = bytearray()
+            count = 0
+            first_time = last_time = None
+            rtc = math.nan
+            while self._pending and count < self.chunk_frames:
+                receive_time, protocol, frames = self._pending.popleft()
+                kind = frameKindBinary if protocol == 'binary' else frameKindAscii
+                for frame in frames:
+                    if kind == frameKindAscii:
+                        frame = b'\r\n'.join(frame)
+                        if math.isnan(rtc):
+                            rtc = rtc_of(frame)
+                    data += frameStruct.pack(receive_time, kind, len(frame))
+                    data += frame
+                    count += 1
+                if first_time is None:
+                    first_time = receive_time
+                last_time = receive_time
+            if not count:
+                continue
+            compressed = zlib.compress(data, self.compress_level)
+            try:
+                offset = self._file.tell()
+                self._file.write(chunkStruct.pack(chunkMagic, len(compressed), count, first_time, last_time))
+                self._file.write(compressed)
+                self._file.flush()
+                self._index.write(indexStruct.pack(offset, self.frames, count, first_time, last_time, rtc))
+                self._index.flush()
+            except OSError as e:
+                logging.error(f"Flight recorder write failed: {e}")
+                return
+            self.frames += count
+            self.bytes += chunkStruct.size + len(compressed)
+
+# --------------------
+# Log Reader
+
+class FlightLog:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, self.start_wall_time, self.start_time = headerStruct.unpack(self._file.read(headerStruct.size))
+        if magic != fileMagic:
+            raise ValueError(f"Not a flight recording: {path}")
+        self.index = self._load_index()
+        self._times = [entry[3] for entry in self.index]
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def frame_count(self):
+        return self.index[-1][1] + self.index[-1][2] if self.index else 0
+
+    @property
+    def duration(self):
+        return self.index[-1][4] - self.index[0][3] if self.index else 0.0
+
+    @property
+    def first_time(self):
+        return self.index[0][3] if self.index else self.start_time
+
+    # Returns [(receive time, kind, frame bytes), ...] of chunk n
+    def read_chunk(self, chunk):
+        offset = self.index[chunk][0]
+        self._file.seek(offset)
+        magic, size, count, first_time, last_time = chunkStruct.unpack(self._file.read(chunkStruct.size))
+        data = zlib.decompress(self._file.read(size))
+        frames = []
+        pos = 0
+        for _ in range(count):
+            receive_time, kind, length = frameStruct.unpack_from(data, pos)
+            pos += frameStruct.size
+            frames.append((receive_time, kind, data[pos:pos + length]))
+            pos += length
+        return frames
+
+    # Chunk holding the first frame received at or after 'receive_time'
+    def find_chunk(self, receive_time):
+        chunk = bisect.bisect_right(self._times, receive_time) - 1
+        if chunk >= 0 and self.index[chunk][4] < receive_time:
+            chunk += 1
+        return max(0, chunk)
+
+    # Yields (receive time, kind, frame bytes) from 'receive_time' on (time.monotonic() of the recording)
+    def frames(self, receive_time=None):
+        chunk = 0 if receive_time is None else self.find_chunk(receive_time)
+        for chunk in range(chunk, len(self.index)):
+            for frame in self.read_chunk(chunk):
+                if receive_time is None or frame[0] >= receive_time:
+                    yield frame
+
+    def _load_index(self):
+        file_size = os.path.getsize(self.path)
+        try:
+            with open(self.path + '.idx', 'rb') as index_file:
+                data = index_file.read()
+            index = list(indexStruct.iter_unpack(data[:len(data) - len(data) % indexStruct.size]))
+        except OSError:
+            index = []
+        # The last entries may point at a chunk that was not written completely
+        while index and self._chunk_size(index[-1][0], file_size) is None:
+            index.pop()
+        if index:
+            offset = index[-1][0] + chunkStruct.size + self._chunk_size(index[-1][0], file_size)
+            first_frame = index[-1][1] + index[-1][2]
+        else:
+            offset = headerStruct.size
+            first_frame = 0
+        return index + self._scan_chunks(offset, file_size, first_frame)
+
+    # Compressed size of the chunk at 'offset', None if it is not complete
+    def _chunk_size(self, offset, file_size):
+        if offset + chunkStruct.size > file_size:
+            return None
+        magic, size = chunkStruct.unpack(self._read_at(offset, chunkStruct.size))[:2]
+        if magic != chunkMagic or offset + chunkStruct.size + size > file_size:
+            return None
+        return size
+
+    # Rebuilds index entries from the chunk headers from 'offset' on
+    def _scan_chunks(self, offset, file_size, first_frame):
+        index = []
+        while (size := self._chunk_size(offset, file_size)) is not None:
+            magic, size, count, first_time, last_time = chunkStruct.unpack(self._read_at(offset, chunkStruct.size))
+            rtc = math.nan
+            try:
+                data = zlib.decompress(self._read_at(offset + chunkStruct.size, size))
+                receive_time, kind, length = frameStruct.unpack_from(data)
+                if kind == frameKindAscii:
+                    rtc = rtc_of(data[frameStruct.size:frameStruct.size + length])
+            except (zlib.error, struct.error):
+                break
+            index.append((offset, first_frame, count, first_time, last_time, rtc))
+            first_frame += count
+            offset += chunkStruct.size + size
+        if index:
+            logging.info(f"Flight log index rebuilt for {len(index)} chunks: {self.path}")
+        return index
+
+    def _read_at(self, offset, size):
+        self._file.seek(offset)
+        return self._file.read(size)
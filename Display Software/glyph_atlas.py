@@ -0,0 +1,70 @@
+# IboSoft EFIS Display Software
+# Glyph atlas for numeric readouts
+#   Readouts and tape labels are built from '0-9', '-' and '.' only. A GlyphAtlas rasterizes them once
+#   for one font and colour into a single surface; blit() lays a string out glyph by glyph at the
+#   font's advances, the way SDL_ttf lays out font.render() of the whole string, with one
+#   Surface.blits() call. Other characters are rasterized on first use and added to the atlas.
+
+# Libraries
+import pygame                   # External
+
+# --------------------
+# Atlas
+
+atlasChars = "0123456789-."
+
+class GlyphAtlas:
+    def __init__(self, font, color, chars=atlasChars):
+        self.font = font
+        self.color = color
+        self.height = font.get_height()     # px, height of every string, like font.render()
+        self.surface = None                 # All glyphs side by side
+        self.glyphs = {}                    # Character -> (area in the atlas, advance in px)
+        self._add(chars)
+
+    # Width of 'text' in px
+    def size(self, text):
+        glyphs = self.glyphs
+        width = 0
+        for char in text:
+            if char not in glyphs:
+                self._add(char)
+            width += glyphs[char][1]
+        return width
+
+    # Blits 'text' with its top at 'y' and its left ('left'), right ('right') or centre ('center') at 'x'.
+    # Returns the rectangle drawn.
+    def blit(self, dest, text, x, y, align='left'):
+        glyphs = self.glyphs
+        if any(char not in glyphs for char in text):
+            self._add(text)
+        if align != 'left':
+            width = self.size(text)
+            x -= width if align == 'right' else width // 2
+        start = x
+        atlas = self.surface
+        sequence = []
+        for char in text:
+            area, advance = glyphs[char]
+            sequence.append((atlas, (x, y), area))
+            x += advance
+        dest.blits(sequence, doreturn=False)
+        return pygame.Rect(start, y, x - start, self.height)
+
+    def _add(self, chars):
+        chars = [char for char in dict.fromkeys(chars) if char not in self.glyphs]
+        if not chars:
+            return
+        rendered = [(char, self.font.render(char, True, self.color)) for char in self.glyphs]
+        rendered += [(char, self.font.render(char, True, self.color)) for char in chars]
+        advances = {char: metrics[4] for char, metrics in zip(chars, self.font.metrics("".join(chars)))}
+        surface = pygame.Surface((sum(glyph.get_width() for char, glyph in rendered), self.height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        x = 0
+        for char, glyph in rendered:
+            surface.blit(glyph, (x, 0))
+            advance = self.glyphs[char][1] if char in self.glyphs else advances[char]
+            self.glyphs[char] = (pygame.Rect(x, 0, glyph.get_width(), self.height), advance)
+            x += glyph.get_width()
+        self.surface = surface
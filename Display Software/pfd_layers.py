@@ -0,0 +1,71 @@
+# IboSoft EFIS Display Software
+# Layered compositor
+#   The PFD is painted in layers: static pictures under the moving instruments (black, VSI background),
+#   the moving instruments, and static pictures over them (PFD background with its windows, roll scale,
+#   flags). Which pictures a static layer has depends only on a state key (the sensor status flags), so
+#   each layer is merged once per key into a pre-converted surface, kept for the last 'cache_size' keys.
+#   A frame starts from the merged static frame: blitted whole for a new key, otherwise only where the
+#   last frame drew. In the 'regions' the moving instruments draw in, the under layer is restored before
+#   them and the over layer blitted after them. Instruments must keep to their regions (clip), everything
+#   else on screen is the static frame.
+
+# Libraries
+import collections              # Internal
+import pygame                   # External
+
+# --------------------
+# Compositor
+
+class LayerCompositor:
+    # 'build(key, under, over)' draws the static pictures for state 'key': 'under' is opaque black,
+    # 'over' transparent. 'regions' are the screen rectangles of the instruments between the two.
+    def __init__(self, size, regions, build, cache_size=4):
+        self.size = size
+        self.regions = [pygame.Rect(region) for region in regions]
+        self.build = build
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()  # Key -> (under, over, frame), least recently used first
+        self.builds = 0                         # Layers merged, for the statistics
+        self.key = None                         # Key of the frame begun last
+        self.over = None                        # Its over layer
+
+    # Static frame where 'restore' rectangles were drawn on (everywhere if None or for a new key) and the
+    # under layer in the regions; the instruments are drawn next. Returns the rectangles of a whole frame.
+    def begin(self, dest, key, restore=None):
+        under, self.over, frame = self._layers(key)
+        if restore is None or key != self.key:
+            self.key = key
+            repainted = [dest.blit(frame, (0, 0))]
+        else:
+            dest.blits([(frame, rect, rect) for rect in restore], doreturn=False)
+            repainted = []
+        dest.blits([(under, region.topleft, region) for region in self.regions], doreturn=False)
+        return repainted
+
+    # Over layer on the instruments in the regions
+    def finish(self, dest):
+        dest.blits([(self.over, region.topleft, region) for region in self.regions], doreturn=False)
+
+    def _layers(self, key):
+        layers = self.cache.get(key)
+        if layers is not None:
+            self.cache.move_to_end(key)
+            return layers
+        layers = self._merge(key)
+        self.cache[key] = layers
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return layers
+
+    def _merge(self, key):
+        self.builds += 1
+        under = pygame.Surface(self.size)
+        over = pygame.Surface(self.size, pygame.SRCALPHA)
+        self.build(key, under, over)
+        frame = under.copy()
+        frame.blit(over, (0, 0))
+        if pygame.display.get_surface() is not None:
+            under = under.convert()
+            over = over.convert_alpha()
+            frame = frame.convert()
+        return under, over, frame
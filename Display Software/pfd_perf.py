@@ -0,0 +1,108 @@
+# IboSoft EFIS Display Software
+# PFD performance counters and overlay
+#   FrameStats is always on. Every frame the PFD loop adds its frame period, draw() and flip time and
+#   the age of the data on screen (s since its serial bytes were read), and counts the snapshots it never
+#   took (dropped_frames). The reader thread counts bytes, ingest time (read data to decoded frames) and
+#   parse time in LinkStats, which only it writes. Once a second summarize() turns both into the text
+#   lines shown by the overlay and the CDU performance page. The overlay renders that text once per
+#   summary, so showing it costs a blit per frame.
+
+# Libraries
+import collections              # Internal
+import pygame                   # External
+
+# --------------------
+# Frame Statistics
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+class FrameStats:
+    def __init__(self, interval=1.0, history=500):
+        self.interval = interval                                # s, summary period
+        self.frame_periods = collections.deque(maxlen=history)  # s, flip to flip, for the percentiles
+        self.display_ages = collections.deque(maxlen=history)   # s
+        self.dropped_frames = 0                                 # Published frames replaced before the PFD took them
+        self.lines = ()                                         # Text of the last summary
+        self._last_flip = None
+        self._frames = 0                # Since the last summary
+        self._render_time = 0.0
+        self._flip_time = 0.0
+        self._summary_time = None
+        self._link = None               # LinkStats counters at the last summary
+
+    # 'now' is time.perf_counter() at the end of the flip
+    def add_frame(self, now, render_time, flip_time, display_age):
+        if self._last_flip is not None:
+            self.frame_periods.append(now - self._last_flip)
+        self._last_flip = now
+        if display_age is not None:
+            self.display_ages.append(display_age)
+        self._frames += 1
+        self._render_time += render_time
+        self._flip_time += flip_time
+
+    # Makes a new summary every 'interval' s; returns True when it did
+    def summarize(self, link_stats, message_interval, now):
+        link = (link_stats.bytes, link_stats.frames, link_stats.ingest_time, link_stats.parse_time)
+        if self._summary_time is None:
+            self._summary_time = now
+            self._link = link
+            return False
+        elapsed = now - self._summary_time
+        if elapsed < self.interval:
+            return False
+
+        frames = max(self._frames, 1)
+        data_frames = max(link[1] - self._link[1], 1)
+        periods = list(self.frame_periods)
+        ages = list(self.display_ages)
+        self.lines = (
+            f"FPS {self._frames / elapsed:5.1f}  frame p50 {percentile(periods, 0.5)*1000:.1f}  p95 {percentile(periods, 0.95)*1000:.1f}"
+            f"  p99 {percentile(periods, 0.99)*1000:.1f}  max {max(periods, default=0)*1000:.1f} ms",
+            f"render {self._render_time / frames * 1000:.2f}  flip {self._flip_time / frames * 1000:.2f} ms/frame",
+            f"ingest {(link[2] - self._link[2]) / data_frames * 1000:.3f}  parse {(link[3] - self._link[3]) / data_frames * 1000:.3f} ms/data frame",
+            f"data age {percentile(ages, 0.5)*1000:.0f} ms  max {max(ages, default=0)*1000:.0f} ms  MCU /i {message_interval} ms",
+            f"link {(link[0] - self._link[0]) / elapsed:.0f} B/s  {(link[1] - self._link[1]) / elapsed:.1f} frames/s",
+            f"dropped {self.dropped_frames}  conflated {link_stats.conflated_frames}  bad {link_stats.bad_frames}"
+            f"  lost {link_stats.lost_frames}  bad lines {link_stats.bad_lines}",
+        )
+        self._summary_time = now
+        self._link = link
+        self._frames = 0
+        self._render_time = 0.0
+        self._flip_time = 0.0
+        self.display_ages.clear()
+        return True
+
+# --------------------
+# Overlay
+
+class PerfOverlay:
+    def __init__(self, font, pos=(5, 5), color=(0, 255, 0)):
+        self.font = font
+        self.pos = pos          # px, top left corner
+        self.color = color
+        self._lines = None      # Lines the surface was rendered from
+        self._surface = None
+
+    # Returns the rectangle drawn, None if there is nothing to show
+    def draw(self, screen, lines):
+        if lines is not self._lines:
+            self._lines = lines
+            self._surface = self._render(lines)
+        if self._surface is not None:
+            return screen.blit(self._surface, self.pos)
+        return None
+
+    def _render(self, lines):
+        if not lines:
+            return None
+        texts = [self.font.render(line, True, self.color) for line in lines]
+        line_height = self.font.get_linesize()
+        surface = pygame.Surface((max(text.get_width() for text in texts) + 8, line_height * len(texts) + 8), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 200))
+        for index, text in enumerate(texts):
+            surface.blit(text, (4, 4 + index * line_height))
+        return surface
@@ -0,0 +1,970 @@
+# IboSoft EFIS Display Software
+# PFD renderer
+#   PfdRenderer draws one PFD frame from a telemetry snapshot and the CDU settings. Every instrument
+#   block is a method; draw() runs them in painting order and keeps the time each block took in
+#   block_times (s, last frame), so the live display and bench_render.py measure the same code.
+#   Every block returns the screen rectangles it drew on and has an inputs function, the values it draws
+#   from. dirty_rects() are the rectangles of the blocks whose inputs changed, where they drew this frame
+#   and the last one: a frame drawn from the same data has none and nothing needs to be shown.
+#   Headless: open_display(headless=True) uses SDL's dummy video driver, nothing is shown.
+
+# Libraries
+import collections              # Internal
+import math                     # Internal
+import os                       # Internal
+import time                     # Internal
+import pygame                   # External
+from glyph_atlas import GlyphAtlas, atlasChars
+from tape_strip import TapeStrip
+from compass_rose import CompassRose
+from rotation_cache import RotationCache
+from pfd_layers import LayerCompositor
+
+# --------------------
+# Display
+SCREEN_WIDTH = 858
+SCREEN_HEIGHT = 857
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+BOEING_GRAY = (104, 104, 104)
+BOEING_MAGENTA = (255, 0, 204)
+BOEING_CYAN = (0, 255, 255)
+BOEING_GREEN = (0, 255, 0)
+BOEING_AMBER = (255, 179, 0)
+BOEING_RED = (252, 0, 0)
+ATT_SKY = (0, 101, 204)
+ATT_GROUND = (101, 51, 0)
+ATT_WHITE = (243, 243, 243)
+
+# Constants
+constHpaToInhg = 0.02952998057228486     # 1 hPa = ? inhg
+
+# Flags
+    # Positions related to top left corner
+pfd_flag_alt_pos = (666, 373)
+pfd_flag_att_pos = (361, 350)
+pfd_flag_att_border_pos = (0, 0)
+pfd_flag_hdg_pos = (358, 815)
+pfd_flag_no_v_spd_pos = (141, 265)
+pfd_flag_spd_pos = (88,373)
+pfd_flag_vert_pos = (789, 359)
+pfd_flag_data_rate_pos = (30, 770)
+
+# Variables
+    # Atitude Indicator
+att_ctr_x = 388
+att_ctr_y = 427
+pitch_offset = 8.8              # Pixels per degree
+att_ladder_step = 2.5           # Degrees between pitch ladder lines
+att_ladder_long = 76            # px, half width of the 10 degree lines
+att_ladder_medium = 37.5        # px, half width of the 5 degree lines
+att_ladder_short = 19           # px, half width of the 2.5 degree lines
+att_ladder_label_gap = 8        # px, between a 10 degree line and its labels
+att_ladder_label_y_offset = 1   # px, down
+att_line_width = 2              # px, horizon and ladder lines
+bank_amber_threshold = 35       # At or more
+slipskid_offset = 250           # Pixels per g
+slipskid_fill_threshold = 0.2   # g
+    # Attitude Border
+border_corner1 = (180, 190)     # Top left corner
+border_corner2 = (600, 640)     # Bottom right corner
+    # Speed
+spd_tape_rect = (45, 105, 110, 645)     # Background; x, y, width, height
+spd_min = 30
+spd_max = 220
+spd_pointer_y = 427     # px
+spd_line_x_left = 128   # px
+spd_line_x_right = 152  # px
+spd_line_width = 3      # px
+spd_div = 50            # px
+spd_div_kts = 10        # kts
+spd_kts_to_px = 10/50   # 0.2
+spd_text_x = 118        # px, aligned to right
+spd_text_y_offset = 1   # -px
+pfd_spd_pointer_pos = (39,385)
+pfdSpdTextPos = (47, 409)
+    # Mach Indicator
+mach_transition = 100       # kts
+pfdMachTextPos = (71, 770)
+    # Altitude
+alt_tape_rect = (623, 105, 110, 645)    # Background; x, y, width, height
+alt_min = -1500
+alt_max = 29500
+alt_pointer_y = 427     # px
+alt_line_x_left = 625   # px
+alt_line_x_right = 649  # px
+alt_line_width = 3      # px
+alt_div = 75            # px
+alt_div_ft = 100        # ft
+alt_ft_to_px = 100/75   # 1.33...
+alt_text_x = 653        # px
+alt_text_y_offset = -12 # -px
+pfd_alt_pointer_pos = (647,385)
+pfdAltTextPos = (671, 410)
+    # Verical Speed Line
+vspd_line_ctr_x_pos = 857       # px
+vspd_line_ctr_y_pos = 427       # px
+vspd_line_tie_x_pos = 778       # px
+vspd_line_width = 5             # px
+vspd_line_rect = (745, 232, 113, 391)   # Window of the line, to the screen edge; x, y, width, height
+vspd_fpmPerPxTo1000 = 12.19     # fpm per px between 0 - 1000
+vspd_fpmPerPxTo2000 = 16.66     # fpm per px between 1000 - 2000
+vspd_fpmPerPxTo6000 = 100.0     # fpm per px between 2000 - 6000
+    # Compass
+pfdCompass_radius = 257             # Pusula yarıçapı      
+pfdCompass_center_x = 390           # Pusula merkezinin x konumu
+pfdCompass_center_y = 968           # Pusula merkezinin y konumu
+pfdCompass_short_tick_length = 15   # Kısa çizgi uzunluğu
+pfdCompass_long_tick_length = 25    # Uzun çizgi uzunluğu
+pfdCompass_degree_line_thickness = 4  # Pusula derece çizgilerinin kalınlığı
+pfdCompass_pointer_pos = (374,690)
+pfdCompass_status_text_pos = (446, 810)
+pfdCompass_cache_size = 64          # Rotated roses kept, about 300 kB each
+pfdCompass_rect = (132, 710, 517, 147)  # Rose and ticks on screen; x, y, width, height
+    # Rate of Turn Indicator
+rot_arc_center_x = 390      # px
+rot_arc_center_y = 968      # px
+rot_arc_radius = 257        # px
+rot_arc_back_thickness = 3  # px
+rot_arc_front_thickness = 4 # px
+rot_tick_thickness = 2      # px
+rot_tick_long_length = 10   # px
+rot_tick_short_length = 6   # px
+rot_arc_limit = 40          # deg, on screen
+rot_scale_factor = 2
+    # Speed Trend Arrow
+accel_arrowX = 128          # px
+accel_arrowCtrY = 427       # px
+accel_arrowLimYUp = 318     # px
+accel_arrowLimYDown = 319   # px
+accel_arrowDeathZone = 10   # px
+accel_arrowThickness = 4    # px
+accel_factor = 2000
+    # Angle of Attack Indicator
+pfdAoaTextPos = (513,152)
+aoa_indicator_pos = (555, 147)
+aoa_arc_radius = 42
+aoa_arc_start_angle = -90
+aoa_arc_end_angle = 135
+aoa_thickness = 3
+aoa_needle_thickness = 4
+aoa_tick_count = 6
+aoa_tick_length = 8
+aoa_min = -90
+aoa_max = 135
+aoa_scale_factor = 4.5
+    # Vertical G Indicator
+pfdGTextPos = (240,135)
+g_indicator_pos_x = 221
+g_indicator_pos_y = 147
+g_arc_radius = 42
+g_arc_start_angle = 45
+g_arc_end_angle = 315
+g_thickness = 3
+g_needle_thickness = 4
+g_tick_count = 5
+g_tick_length = 8
+g_min = -90
+g_max = 135
+g_scale_factor = 67.5
+g_peak_tick_length = 8
+    # Error Messages
+pfdDataTimeoutPos = (SCREEN_WIDTH/2, 20)  # Center referenced
+
+# --------------------
+# PFD settings set from the CDU. A settings object is never modified; updates replace it as a whole.
+PfdSettings = collections.namedtuple('PfdSettings', [
+    'menu_pfd_altStgUnit',  # True: hPa, False: inHg
+    'menu_pfd_altStgHpa',
+    'menu_pfd_altStgInHg',
+    'menu_pfd_altStgStd',   # True: STD
+    'menu_pfd_ta',
+    'menu_pfd_trl',
+    'menu_pfd_magTru',      # True: TRU, False: MAG
+    'menu_pfd_magCorr',     # True: Corrected, False: Uncorrected
+    'menu_pfd_magVar',
+    'menu_pfd_resetG',      # Reset G Peaks
+    'menu_pfd_perfOverlay', # Performance overlay on the PFD
+])
+
+pfdSettingsDefaults = PfdSettings(
+    menu_pfd_altStgUnit=True,
+    menu_pfd_altStgHpa=1013,
+    menu_pfd_altStgInHg=29.92,
+    menu_pfd_altStgStd=False,
+    menu_pfd_ta=10000,
+    menu_pfd_trl=100,
+    menu_pfd_magTru=False,
+    menu_pfd_magCorr=True,
+    menu_pfd_magVar=0.0,
+    menu_pfd_resetG=False,
+    menu_pfd_perfOverlay=False,
+)
+
+# --------------------
+# Functions
+def take_sign(value):
+    if value < 0:
+        return -1
+    else:
+        return 1
+
+# Dereceyi radyana çevirme fonksiyonu
+def degrees_to_radians(degrees):
+    return degrees * math.pi / 180
+
+# Arc çizme fonksiyonu
+def draw_arc(surface, color, center, radius, start_angle, end_angle, thickness):
+    # Convert angles to radians
+    start_angle_rad = math.radians(start_angle)
+    end_angle_rad = math.radians(end_angle)
+
+    # Calculate the number of segments needed to approximate the thickness
+    num_segments = int(thickness)
+
+    # Draw each segment of the arc
+    rects = []
+    for i in range(num_segments):
+        outer_radius = radius + i
+        inner_radius = radius - thickness + i
+        outer_rect = pygame.Rect(center[0] - outer_radius, center[1] - outer_radius, outer_radius * 2, outer_radius * 2)
+        inner_rect = pygame.Rect(center[0] - inner_radius, center[1] - inner_radius, inner_radius * 2, inner_radius * 2)
+        rects.append(pygame.draw.arc(surface, color, outer_rect, start_angle_rad, end_angle_rad, 1))
+        rects.append(pygame.draw.arc(surface, color, inner_rect, start_angle_rad, end_angle_rad, 1))
+    return rects[0].unionall(rects[1:]) if rects else pygame.Rect(center, (0, 0))    # Drawn on
+
+# İbre çizme fonksiyonu
+def draw_hand(surface, color, center, radius, angle, thickness):
+    angle_radians = degrees_to_radians(angle)
+    end_pos = (center[0] + radius * math.cos(angle_radians), center[1] - radius * math.sin(angle_radians))
+    return pygame.draw.line(surface, color, center, end_pos, thickness)
+
+# Çentik çizme fonksiyonu
+def draw_ticks_in(surface, color, center, radius, start_angle, end_angle, tick_count, tick_length, thickness):
+    angle_interval = (end_angle - start_angle) / (tick_count - 1)
+    rect = pygame.Rect(center, (0, 0))     # Drawn on
+    for i in range(tick_count):
+        angle = start_angle + i * angle_interval
+        angle_radians = degrees_to_radians(angle)
+        start_pos = (center[0] + radius * math.cos(angle_radians), center[1] - radius * math.sin(angle_radians))
+        end_pos = (center[0] + (radius - tick_length) * math.cos(angle_radians), center[1] - (radius - tick_length) * math.sin(angle_radians))
+        tick = pygame.draw.line(surface, color, start_pos, end_pos, thickness)
+        rect = rect.union(tick) if i else tick
+    return rect
+
+def draw_ticks_out(surface, color, center, radius, start_angle, end_angle, tick_count, tick_length, thickness):
+    angle_interval = (end_angle - start_angle) / (tick_count - 1)
+    rect = pygame.Rect(center, (0, 0))     # Drawn on
+    for i in range(tick_count):
+        angle = start_angle + i * angle_interval
+        angle_radians = degrees_to_radians(angle)
+        
+        # Çentiğin başlayacağı nokta (çemberin üzerinde)
+        start_pos = (center[0] + radius * math.cos(angle_radians), center[1] - radius * math.sin(angle_radians))
+        
+        # Çentiğin biteceği nokta (çemberin dışına doğru)
+        end_pos = (center[0] + (radius + tick_length) * math.cos(angle_radians), center[1] - (radius + tick_length) * math.sin(angle_radians))
+        
+        tick = pygame.draw.line(surface, color, start_pos, end_pos, thickness)
+        rect = rect.union(tick) if i else tick
+    return rect
+
+# Part of the polygon 'points' on the side of the line through 'point' that 'normal' points to
+def clip_to_half_plane(points, point, normal):
+    clipped = []
+    for index, start in enumerate(points):
+        end = points[(index + 1) % len(points)]
+        start_side = (start[0] - point[0])*normal[0] + (start[1] - point[1])*normal[1]
+        end_side = (end[0] - point[0])*normal[0] + (end[1] - point[1])*normal[1]
+        if start_side >= 0:
+            clipped.append(start)
+        if (start_side >= 0) != (end_side >= 0):
+            t = start_side / (start_side - end_side)
+            clipped.append((start[0] + (end[0] - start[0])*t, start[1] + (end[1] - start[1])*t))
+    return clipped
+
+# Draw Arrow
+def draw_arrow(screen, color, start, end, thickness):
+    rect = pygame.draw.line(screen, color, start, end, thickness)
+    
+    # Ok ucunu çizmek için yön ve açı hesaplamaları
+    rotation = math.atan2(start[1] - end[1], end[0] - start[0]) 
+    arrow_length = 10
+    arrow_angle = math.pi / 6
+
+    # Ok ucunun sağ tarafı
+    right_arrow_x = end[0] + arrow_length * math.cos(rotation + arrow_angle)
+    right_arrow_y = end[1] + arrow_length * math.sin(rotation + arrow_angle)
+    
+    # Ok ucunun sol tarafı
+    left_arrow_x = end[0] + arrow_length * math.cos(rotation - arrow_angle)
+    left_arrow_y = end[1] + arrow_length * math.sin(rotation - arrow_angle)
+    
+    rect = rect.union(pygame.draw.line(screen, color, end, (right_arrow_x, right_arrow_y), thickness))
+    return rect.union(pygame.draw.line(screen, color, end, (left_arrow_x, left_arrow_y), thickness))   # Drawn on
+
+# --------------------
+# Opens the PFD window, or with 'headless' an off-screen display on SDL's dummy video driver
+def open_display(headless=False):
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    else:
+        pygame.display.set_icon(pygame.image.load("images/pfd.ico"))
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Primary Flight Display")
+    return screen
+
+# --------------------
+# Renderer
+
+class PfdRenderer:
+    def __init__(self, screen, data_low_rate_thr=100, compass_step=0.5, roll_step=0.5, rotation_budget=64*2**20):
+        self.screen = screen
+        self.data_low_rate_thr = data_low_rate_thr  # ms, DATA RATE flag above this MCU loop time
+        self.data_timeout = True                    # DATA TIMEOUT message, set by draw()
+
+        # PFD Background
+        self.pfdBackground = pygame.image.load("pfd_symbology/pfd_background.png")
+
+        # Flags
+        self.pfd_flag_alt = pygame.image.load("pfd_flags/pfd_flag_alt.png")
+        self.pfd_flag_att = pygame.image.load("pfd_flags/pfd_flag_att.png")
+        self.pfd_flag_att_border = pygame.image.load("pfd_flags/pfd_flag_att_border.png")
+        self.pfd_flag_hdg = pygame.image.load("pfd_flags/pfd_flag_hdg.png")
+        self.pfd_flag_no_v_spd = pygame.image.load("pfd_flags/pfd_flag_no_v_spd.png")
+        self.pfd_flag_spd = pygame.image.load("pfd_flags/pfd_flag_spd.png")
+        self.pfd_flag_vert = pygame.image.load("pfd_flags/pfd_flag_vert.png")
+        self.pfd_flag_data_rate = pygame.image.load("pfd_flags/pfd_flag_data_rate.png")
+
+        # Fonts
+        self.pfdSpdFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 24)
+        self.pfdHdgFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 12)
+        self.pfdVspdFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 14)
+
+        self.pfdSpdFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 20)
+        self.pfdSpdTapeFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 16)
+
+        self.pfdMachFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 20)
+
+        self.pfdAltFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 18)
+        self.pfdAltTapeFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 14)
+
+        self.pfdAltStgFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 14)
+        self.pfdAltStgUnitFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 12)
+        self.pfdAltStdFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 20)
+        self.pfdAltStgStbyFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 12)
+
+        self.pfdCompass_font_small = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 12)
+        self.pfdCompass_font_large = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 16)
+        self.pfdCompass_status_text_font = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 10)
+        self.pfdCompass_status_texts = {
+            "TRU": self.pfdCompass_status_text_font.render("TRU", True, BOEING_GREEN),
+            "MAG": self.pfdCompass_status_text_font.render("MAG", True, BOEING_GREEN),
+            "TRU UNCORR": self.pfdCompass_status_text_font.render("TRU UNCORR", True, BOEING_AMBER),
+            "MAG UNCORR": self.pfdCompass_status_text_font.render("MAG UNCORR", True, BOEING_AMBER),
+        }
+
+        self.pfdAoaFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 10)
+
+        self.pfdGFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 14)
+        self.pfdAttLadderFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 12)
+
+        self.pfdDataTimeoutFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 24)
+        self.pfdDataLowRateFont = pygame.font.Font('fonts/OCR-B/OCR-B.ttf', 16)
+
+        # Numeric readouts and tape labels
+        self.pfdSpdTapeDigits = GlyphAtlas(self.pfdSpdTapeFont, WHITE)
+        self.pfdAltTapeDigits = GlyphAtlas(self.pfdAltTapeFont, WHITE)
+        self.pfdSpdDigits = GlyphAtlas(self.pfdSpdFont, WHITE)
+        self.pfdMachDigits = GlyphAtlas(self.pfdMachFont, WHITE)
+        self.pfdAltDigits = GlyphAtlas(self.pfdAltFont, WHITE)
+        self.pfdVspdDigits = GlyphAtlas(self.pfdVspdFont, WHITE)
+        self.pfdAltStgGreenDigits = GlyphAtlas(self.pfdAltStgFont, BOEING_GREEN)
+        self.pfdAltStgAmberDigits = GlyphAtlas(self.pfdAltStgFont, BOEING_AMBER)
+        self.pfdAltStgStbyDigits = GlyphAtlas(self.pfdAltStgStbyFont, WHITE, atlasChars + " HPAIN")
+        self.pfdAoaDigits = GlyphAtlas(self.pfdAoaFont, WHITE)
+        self.pfdGDigits = GlyphAtlas(self.pfdGFont, WHITE)
+
+        # Speed and altitude tapes, scales drawn once
+        self.spdTapeStrip = TapeStrip(spd_tape_rect, BOEING_GRAY, spd_min, spd_max, spd_div_kts, 1/spd_kts_to_px, self._draw_speed_division,
+                                      margin=self.pfdSpdTapeDigits.height//2 + spd_text_y_offset + spd_line_width)
+        self.altTapeStrip = TapeStrip(alt_tape_rect, BOEING_GRAY, alt_min, alt_max, alt_div_ft, 1/alt_ft_to_px, self._draw_altitude_division,
+                                      margin=self.pfdAltTapeDigits.height + abs(alt_text_y_offset) + alt_line_width)
+
+        # Compass rose, drawn once and rotated for the heading
+        self.pfdCompassRose = CompassRose((pfdCompass_center_x, pfdCompass_center_y), pfdCompass_radius, pfdCompass_short_tick_length,
+                                          pfdCompass_long_tick_length, pfdCompass_degree_line_thickness,
+                                          (self.pfdCompass_font_small, self.pfdCompass_font_large), BOEING_GRAY, WHITE,
+                                          screen.get_rect(), compass_step, pfdCompass_cache_size)
+
+        # Attitude Indicator
+            # Drawn from pitch and roll in the window between the border corners
+        self.att_window = pygame.Rect(min(border_corner1[0], border_corner2[0]), min(border_corner1[1], border_corner2[1]),
+                                      abs(border_corner2[0] - border_corner1[0]), abs(border_corner2[1] - border_corner1[1]))
+        self.att_reach = max(math.hypot(x - att_ctr_x, y - att_ctr_y) for x, y in (self.att_window.topleft, self.att_window.topright,
+                                                                                    self.att_window.bottomleft, self.att_window.bottomright))  # px, farthest window corner
+            # Pitch ladder labels, trimmed to their glyphs
+        self.pfd_att_labels = {}
+        for pitch in range(10, 91, 10):
+            label = self.pfdAttLadderFont.render(str(pitch), True, ATT_WHITE)
+            self.pfd_att_labels[pitch] = label.subsurface(label.get_bounding_rect()).copy()
+
+        self.pfd_att_roll_pointer_img = pygame.image.load("pfd_symbology/pfd_att_roll_pointer.png")
+        self.pfd_att_roll_pointer_amber_img = pygame.image.load("pfd_symbology/pfd_att_roll_pointer_amber.png")
+
+        self.pfd_att_slipskid_white_img = pygame.image.load("pfd_symbology/pfd_att_slipskid_white.png")
+        self.pfd_att_slipskid_white_filled_img = pygame.image.load("pfd_symbology/pfd_att_slipskid_white_filled.png")
+        self.pfd_att_slipskid_amber_img = pygame.image.load("pfd_symbology/pfd_att_slipskid_amber.png")
+        self.pfd_att_slipskid_amber_filled_img = pygame.image.load("pfd_symbology/pfd_att_slipskid_amber_filled.png")
+        self.pfd_att_sprites = {   # Rotation cache keys
+            'roll_pointer': self.pfd_att_roll_pointer_img,
+            'roll_pointer_amber': self.pfd_att_roll_pointer_amber_img,
+            'slipskid_white': self.pfd_att_slipskid_white_img,
+            'slipskid_white_filled': self.pfd_att_slipskid_white_filled_img,
+            'slipskid_amber': self.pfd_att_slipskid_amber_img,
+            'slipskid_amber_filled': self.pfd_att_slipskid_amber_filled_img,
+        }
+        self.rotations = RotationCache(roll_step, rotation_budget)
+
+        self.pfd_att_split_axis_pointer = pygame.image.load("pfd_symbology/pfd_att_split_axis_pointer.png")
+        self.pfd_att_roll_scale = pygame.image.load("pfd_symbology/pfd_att_roll_scale.png")
+
+        # Vertical Speed Background
+        self.pfd_vspd_background = pygame.image.load("pfd_symbology/pfd_vspd_background.png")
+
+        # Pointers
+        self.pfd_spd_pointer = pygame.image.load("pfd_symbology/pfd_spd_pointer.png")
+        self.pfd_alt_pointer = pygame.image.load("pfd_symbology/pfd_alt_pointer.png")
+        self.pfd_compass_pointer = pygame.image.load("pfd_symbology/pfd_compass_pointer.png")
+
+        # Static layers under and over the moving instruments, merged per sensor status
+        self.layers = LayerCompositor((SCREEN_WIDTH, SCREEN_HEIGHT), (self.att_window, spd_tape_rect, alt_tape_rect, vspd_line_rect, pfdCompass_rect),
+                                      self._build_layers)
+
+        # Instrument state kept between frames
+        self.transition_buffer_trl_ta = False   # For determining if airplane at between transition altitude and level
+        self.transition_buffer_ta_trl = False   # For determining if airplane at between transition altitude and level
+        self.alt_stg_prev_alt_stg = 101300.0
+        self.alt_stg_stby_buffer = False
+        self.spd_tape_value = spd_min           # Speed tape value, also shown by the speed readout
+        self.alt_tape_value = 0                 # Altitude tape value, also shown by the altitude readout
+        self.g_peak_max = -99.9
+        self.g_peak_min = +99.9
+
+        # (block name, method, clip, inputs) in painting order. A name may paint in several passes, e.g. a
+        # tape and its readout over the PFD background; block_times adds them up. Blocks between the two
+        # background passes are under the over layer and draw only in their clip, one of the compositor's
+        # regions. inputs(telemetry, settings), taken just before the block draws, are all the values its
+        # pixels depend on, renderer state included; None: what the block returns is always dirty.
+        self.blocks = (
+            ('background', self.draw_background, None, None),
+            ('attitude', self.draw_attitude, self.att_window, lambda t, s: (t.imuStatus, t.drv_pitch, t.drv_roll)),
+            ('slip_skid', self.draw_slip_skid, self.att_window, lambda t, s: (t.imuStatus, t.imu_ax, t.drv_roll)),
+            ('speed_tape', self.draw_speed_tape, spd_tape_rect, lambda t, s: (t.diffStatus, t.drv_kias)),
+            ('altitude_tape', self.draw_altitude_tape, alt_tape_rect, lambda t, s: (t.pressStatus, t.drv_indAltFt)),
+            ('vsi', self.draw_vsi_line, vspd_line_rect, lambda t, s: (t.pressStatus, t.drv_baroVspdFpm)),
+            ('speed_trend', self.draw_speed_trend, spd_tape_rect, lambda t, s: (t.imuStatus, t.drv_linearAcc)),
+            ('compass', self.draw_compass, pfdCompass_rect,
+             lambda t, s: (t.magStatus, t.drv_magCorrHdg, t.drv_magUncorrHdg, s.menu_pfd_magCorr, s.menu_pfd_magTru, s.menu_pfd_magVar)),
+            ('background', self.draw_pfd_background, None, None),
+            ('rate_of_turn', self.draw_rate_of_turn, None, lambda t, s: (t.imuStatus, t.drv_turnRate)),
+            ('compass', self.draw_compass_pointer, None, lambda t, s: (t.magStatus,)),
+            ('vsi', self.draw_vsi_readout, None, lambda t, s: (t.pressStatus, round(t.drv_baroVspdFpm / 50))),
+            ('speed_tape', self.draw_speed_readout, None,
+             lambda t, s: (t.diffStatus, round(self.spd_tape_value), round(t.drv_mach, 3) if int(t.drv_kias) >= mach_transition else None)),
+            ('altitude_tape', self.draw_altitude_readout, None, lambda t, s: (t.pressStatus, int(round(self.alt_tape_value, -1)))),
+            ('altimeter_setting', self.draw_altimeter_setting, None, self.altimeter_setting_inputs),
+            ('aoa', self.draw_aoa, None, lambda t, s: (t.aoa_angle,)),
+            ('g_meter', self.draw_g_meter, None, lambda t, s: (t.imuStatus, t.imu_ay, self.g_peak_max, self.g_peak_min)),
+            ('flags', self.draw_flags, None, lambda t, s: (t.messageInterval > self.data_low_rate_thr, self.data_timeout)),
+        )
+        self.block_times = dict.fromkeys(name for name, draw_block, clip, inputs in self.blocks)  # s, last frame
+        self.frame_time = 0.0   # s, draw() of the last frame
+        self.drawn_rects = []   # Screen rectangles drawn on this frame
+        self.erased_rects = []  # Drawn on the last frame, repainted with the static frame this frame
+        self.changed_rects = [] # Drawn on by the blocks whose inputs changed, this frame and the last one
+        self.block_inputs = [None] * len(self.blocks)   # Inputs of each block on the last frame
+        self.block_rects = [[]] * len(self.blocks)      # Rectangles each block drew on the last frame
+        self.marks = []         # (rectangle, key) marked after this frame's draw()
+        self.last_marks = []
+
+    def reset_g_peaks(self, g):
+        self.g_peak_max = g
+        self.g_peak_min = g
+
+    # Draws a frame into the screen surface; showing it (flip or update of dirty_rects()) is left to the caller
+    def draw(self, telemetry, settings, data_timeout=False):
+        self.data_timeout = data_timeout
+        block_times = self.block_times
+        for name in block_times:
+            block_times[name] = 0.0
+        self.erased_rects = self.drawn_rects
+        self.drawn_rects = drawn_rects = []
+        self.changed_rects = changed_rects = []
+        self.last_marks = self.marks
+        self.marks = []
+        block_inputs = self.block_inputs
+        block_rects = self.block_rects
+        screen = self.screen
+        start = last = time.perf_counter()
+        for index, (name, draw_block, clip, inputs) in enumerate(self.blocks):
+            values = inputs(telemetry, settings) if inputs is not None else None
+            if clip is not None:
+                screen.set_clip(clip)
+                rects = draw_block(telemetry, settings)
+                screen.set_clip(None)
+                rects = [rect.clip(clip) for rect in rects] if rects else []
+            else:
+                rects = draw_block(telemetry, settings) or []
+            drawn_rects += rects
+            if inputs is None:
+                changed_rects += rects
+            elif values != block_inputs[index]:
+                changed_rects += [rect for rect in block_rects[index] if rect not in rects]
+                changed_rects += rects
+                block_inputs[index] = values
+            block_rects[index] = rects
+            now = time.perf_counter()
+            block_times[name] += now - last
+            last = now
+        self.frame_time = last - start
+
+    # Reports 'rect' drawn on the screen after draw(), e.g. an overlay: it is repainted next frame. 'key'
+    # stands for what was drawn; the same rectangle and key as on the last frame is not dirty, None always is.
+    def mark(self, rect, key=None):
+        if rect is not None:
+            rect = pygame.Rect(rect)
+            self.drawn_rects.append(rect)
+            self.marks.append((rect, key))
+
+    # Screen rectangles that may differ from the last frame shown: changed blocks, new or changed marks and
+    # the last frame's marks that are gone
+    def dirty_rects(self):
+        marks = self.marks
+        last_marks = self.last_marks
+        return (self.changed_rects + [rect for rect, key in marks if key is None or (rect, key) not in last_marks]
+                + [rect for rect, key in last_marks if key is None or (rect, key) not in marks])
+
+    # --------------------
+    # Instrument Blocks
+
+    # Static pictures of a sensor status: (imu, mag, press, diff)
+    def layer_key(self, telemetry):
+        return (bool(telemetry.imuStatus), bool(telemetry.magStatus), bool(telemetry.pressStatus), bool(telemetry.diffStatus))
+
+    # Draws the static layers of 'key' for the compositor: black and the VSI background under the
+    # instruments; split axis pointer, roll scale, PFD background and sensor flags over them
+    def _build_layers(self, key, under, over):
+        imuStatus, magStatus, pressStatus, diffStatus = key
+        under.fill(BLACK)
+        if pressStatus:
+            under.blit(self.pfd_vspd_background, (0, 0))
+
+        if imuStatus:
+            over.blit(self.pfd_att_split_axis_pointer, (0, 0))
+            over.blit(self.pfd_att_roll_scale, (0, 0))
+        over.blit(self.pfdBackground, (0, 0))
+
+        # Flags:
+        if not imuStatus:
+            over.blit(self.pfd_flag_att_border, pfd_flag_att_border_pos)
+            over.blit(self.pfd_flag_att, pfd_flag_att_pos)
+        if not magStatus:
+            over.blit(self.pfd_flag_hdg, pfd_flag_hdg_pos)
+        if not pressStatus:
+            over.blit(self.pfd_flag_alt, pfd_flag_alt_pos)
+            over.blit(self.pfd_flag_vert, pfd_flag_vert_pos)
+        if not diffStatus:
+            over.blit(self.pfd_flag_spd, pfd_flag_spd_pos)
+
+    # Static frame where the last frame drew, the moving instruments under the PFD background are drawn on it
+    def draw_background(self, telemetry, settings):
+        return self.layers.begin(self.screen, self.layer_key(telemetry), self.erased_rects)
+
+    def draw_attitude(self, telemetry, settings):
+        screen = self.screen
+        if telemetry.imuStatus:
+                # Attitude Image
+                # Pitch displacement along the rotated vertical axis
+            if -90 <= telemetry.drv_pitch and telemetry.drv_pitch < 90:
+                pitch_px = pitch_offset * telemetry.drv_pitch
+            elif 90 <= telemetry.drv_pitch and telemetry.drv_pitch < 180:
+                pitch_px = pitch_offset * (telemetry.drv_pitch-180)
+            else:
+                pitch_px = pitch_offset * (telemetry.drv_pitch+180)
+            roll_cos = math.cos(math.radians(telemetry.drv_roll))
+            roll_sin = math.sin(math.radians(telemetry.drv_roll))
+                # Screen position of a point of the level scene, x right and y down (px) from the horizon center
+            def att_point(x, y):
+                y += pitch_px
+                return (att_ctr_x + x*roll_cos + y*roll_sin, att_ctr_y - x*roll_sin + y*roll_cos)
+
+                # Ground, then the sky side of the horizon
+            screen.fill(ATT_GROUND, self.att_window)
+            window = self.att_window
+            sky = clip_to_half_plane([window.topleft, window.topright, window.bottomright, window.bottomleft], att_point(0, 0), (-roll_sin, -roll_cos))
+            if len(sky) >= 3:
+                pygame.draw.polygon(screen, ATT_SKY, sky)
+                # Lines are thin polygons, as thick at any roll
+            line_half = att_line_width/2
+            def att_line(half, y):
+                pygame.draw.polygon(screen, ATT_WHITE, (att_point(-half, y - line_half), att_point(half, y - line_half),
+                                                        att_point(half, y + line_half), att_point(-half, y + line_half)))
+            att_line(2*self.att_reach, 0)   # Horizon
+                # Pitch ladder: a line every 2.5 degrees up to 90, labels on the 10 degree lines. Only lines that can cross the window.
+            ladder_px = att_ladder_step*pitch_offset
+            ladder_steps = round(90/att_ladder_step)
+            for ladder_step in range(max(-ladder_steps, math.ceil((pitch_px - self.att_reach)/ladder_px)), min(ladder_steps, math.floor((pitch_px + self.att_reach)/ladder_px)) + 1):
+                if ladder_step == 0:
+                    continue
+                y = -ladder_step*ladder_px
+                if ladder_step % 4 == 0:
+                    half = att_ladder_long
+                elif ladder_step % 2 == 0:
+                    half = att_ladder_medium
+                else:
+                    half = att_ladder_short
+                att_line(half, y)
+                if ladder_step % 4 == 0:
+                    label = abs(ladder_step)//4*10
+                    label_x = half + att_ladder_label_gap + self.pfd_att_labels[label].get_width()/2
+                    self.rotations.blit(screen, ('ladder', label), self.pfd_att_labels[label], telemetry.drv_roll, att_point(-label_x, y + att_ladder_label_y_offset))
+                    self.rotations.blit(screen, ('ladder', label), self.pfd_att_labels[label], telemetry.drv_roll, att_point(label_x, y + att_ladder_label_y_offset))
+
+                # Roll Pointer
+            if abs(telemetry.drv_roll) < bank_amber_threshold:
+                self.rotations.blit(screen, 'roll_pointer', self.pfd_att_roll_pointer_img, telemetry.drv_roll, (att_ctr_x, att_ctr_y))
+            else:
+                self.rotations.blit(screen, 'roll_pointer_amber', self.pfd_att_roll_pointer_amber_img, telemetry.drv_roll, (att_ctr_x, att_ctr_y))
+            return [self.att_window]
+
+    def draw_slip_skid(self, telemetry, settings):
+        screen = self.screen
+        if telemetry.imuStatus:
+            # Slip/Skid Indicator
+            if abs(telemetry.imu_ax) <= slipskid_fill_threshold:
+                slipskid_ax = telemetry.imu_ax
+                slipskid = 'slipskid_white' if abs(telemetry.drv_roll) < bank_amber_threshold else 'slipskid_amber'
+            else:
+                slipskid_ax = take_sign(telemetry.imu_ax)*slipskid_fill_threshold
+                slipskid = 'slipskid_white_filled' if abs(telemetry.drv_roll) < bank_amber_threshold else 'slipskid_amber_filled'
+                # Displace image according to rotaton
+            slipskid_center = (att_ctr_x + round(slipskid_ax*slipskid_offset*math.cos(math.radians(telemetry.drv_roll))),
+                               att_ctr_y - round(slipskid_ax*slipskid_offset*math.sin(math.radians(telemetry.drv_roll))))
+                # Draw att image
+            return [self.rotations.blit(screen, slipskid, self.pfd_att_sprites[slipskid], telemetry.drv_roll, slipskid_center)]
+
+    # Fills the rotation cache for rolls of 'low' to 'high' (deg): roll pointers, slip/skid and pitch ladder labels.
+    # Returns the number of rotations cached.
+    def prewarm_rotations(self, low=-60, high=60):
+        count = 0
+        for name, sprite in self.pfd_att_sprites.items():
+            count += self.rotations.prewarm(name, sprite, low, high)
+        for label, sprite in self.pfd_att_labels.items():
+            count += self.rotations.prewarm(('ladder', label), sprite, low, high)
+        return count
+
+    def draw_speed_tape(self, telemetry, settings):
+        screen = self.screen
+        # Speed Tape
+        if telemetry.diffStatus:
+            self.spd_tape_value = telemetry.drv_kias
+            if self.spd_tape_value < spd_min:
+                self.spd_tape_value = spd_min
+            if self.spd_tape_value > spd_max:
+                self.spd_tape_value = spd_max
+
+            return [self.spdTapeStrip.blit(screen, self.spd_tape_value, spd_pointer_y)]
+
+    def draw_altitude_tape(self, telemetry, settings):
+        screen = self.screen
+        # Altitude Tape
+        if telemetry.pressStatus:
+            self.alt_tape_value = telemetry.drv_indAltFt
+            if self.alt_tape_value < alt_min:
+                self.alt_tape_value = alt_min
+            if self.alt_tape_value > alt_max:
+                self.alt_tape_value = alt_max
+
+            return [self.altTapeStrip.blit(screen, self.alt_tape_value, alt_pointer_y)]
+
+    # Tape strip divisions: a line every division, a label every second one. x is relative to the tape background.
+    def _draw_speed_division(self, surface, value, y):
+        left = spd_tape_rect[0]
+        pygame.draw.line(surface, WHITE, (spd_line_x_left-left, y), (spd_line_x_right-left, y), spd_line_width)
+        if value % (2*spd_div_kts) == 0:
+            self.pfdSpdTapeDigits.blit(surface, format(int(value)), spd_text_x-left, y+spd_text_y_offset-self.pfdSpdTapeDigits.height//2, 'right')
+
+    def _draw_altitude_division(self, surface, value, y):
+        left = alt_tape_rect[0]
+        pygame.draw.line(surface, WHITE, (alt_line_x_left-left, y), (alt_line_x_right-left, y), alt_line_width)
+        if value % (2*alt_div_ft) == 0:
+            self.pfdAltTapeDigits.blit(surface, format(int(value)), alt_text_x-left, y+alt_text_y_offset)
+
+    def draw_vsi_line(self, telemetry, settings):
+        screen = self.screen
+        # Vertical Speed Line
+        if telemetry.pressStatus:
+            if telemetry.drv_baroVspdFpm >= 0:
+                if telemetry.drv_baroVspdFpm <= 1000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos - round(telemetry.drv_baroVspdFpm / vspd_fpmPerPxTo1000)
+                elif telemetry.drv_baroVspdFpm <= 2000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos - round(1000 / vspd_fpmPerPxTo1000 + (telemetry.drv_baroVspdFpm-1000) / vspd_fpmPerPxTo2000)
+                elif telemetry.drv_baroVspdFpm <= 6000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos - round(1000 / vspd_fpmPerPxTo1000 + 1000 / vspd_fpmPerPxTo2000 + (telemetry.drv_baroVspdFpm-2000) / vspd_fpmPerPxTo6000)
+                else:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos - round(1000 / vspd_fpmPerPxTo1000 + 1000 / vspd_fpmPerPxTo2000 + 4000 / vspd_fpmPerPxTo6000)
+            else:
+                if telemetry.drv_baroVspdFpm >= -1000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos + round(-telemetry.drv_baroVspdFpm / vspd_fpmPerPxTo1000)
+                elif telemetry.drv_baroVspdFpm >= -2000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos + round(1000 / vspd_fpmPerPxTo1000 + (-telemetry.drv_baroVspdFpm-1000) / vspd_fpmPerPxTo2000)
+                elif telemetry.drv_baroVspdFpm >= -6000:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos + round(1000 / vspd_fpmPerPxTo1000 + 1000 / vspd_fpmPerPxTo2000 + (-telemetry.drv_baroVspdFpm-2000) / vspd_fpmPerPxTo6000)
+                else:
+                    vspd_line_tie_y_pos = vspd_line_ctr_y_pos + round(1000 / vspd_fpmPerPxTo1000 + 1000 / vspd_fpmPerPxTo2000 + 4000 / vspd_fpmPerPxTo6000)
+
+            return [pygame.draw.line(screen, WHITE, (vspd_line_ctr_x_pos,vspd_line_ctr_y_pos), (vspd_line_tie_x_pos,vspd_line_tie_y_pos), vspd_line_width)]
+
+    def draw_speed_trend(self, telemetry, settings):
+        screen = self.screen
+        # Speed Trend Arrow
+        if telemetry.imuStatus:
+            accel_ArrowTipY = accel_arrowCtrY + round((-telemetry.drv_linearAcc)*accel_factor)
+
+            if (abs(accel_ArrowTipY) >= accel_arrowCtrY+accel_arrowDeathZone) or (abs(accel_ArrowTipY) <= accel_arrowCtrY-accel_arrowDeathZone):
+                if accel_ArrowTipY <= accel_arrowCtrY-accel_arrowLimYUp:
+                    accel_ArrowTipY = accel_arrowCtrY-accel_arrowLimYUp
+                if accel_ArrowTipY >= accel_arrowCtrY+accel_arrowLimYDown:
+                    accel_ArrowTipY = accel_arrowCtrY+accel_arrowLimYDown
+
+                return [draw_arrow(screen, BOEING_GREEN, (accel_arrowX, accel_arrowCtrY), (accel_arrowX, accel_ArrowTipY), accel_arrowThickness)]
+
+    def draw_compass(self, telemetry, settings):
+        screen = self.screen
+        # Compass
+        if telemetry.magStatus:
+            if settings.menu_pfd_magCorr:
+                if settings.menu_pfd_magTru:
+                    compassValue = telemetry.drv_magCorrHdg + settings.menu_pfd_magVar
+                    pfdCompass_status_text = self.pfdCompass_status_texts["TRU"]
+                else:
+                    compassValue = telemetry.drv_magCorrHdg
+                    pfdCompass_status_text = self.pfdCompass_status_texts["MAG"]
+            else:
+                if settings.menu_pfd_magTru:
+                    compassValue = telemetry.drv_magUncorrHdg + settings.menu_pfd_magVar
+                    pfdCompass_status_text = self.pfdCompass_status_texts["TRU UNCORR"]
+                else:
+                    compassValue = telemetry.drv_magUncorrHdg
+                    pfdCompass_status_text = self.pfdCompass_status_texts["MAG UNCORR"]
+
+                # Kerteriz çemberini çiz
+            rose = self.pfdCompassRose.blit(screen, compassValue)
+
+            return [rose, screen.blit(pfdCompass_status_text, pfdCompass_status_text_pos)]
+
+    # PFD background, split axis pointer, roll scale and sensor flags over the instruments in their regions
+    def draw_pfd_background(self, telemetry, settings):
+        self.layers.finish(self.screen)
+
+    def draw_rate_of_turn(self, telemetry, settings):
+        screen = self.screen
+        # Rate of Turn Indicator
+        if telemetry.imuStatus:
+            rot_value = -telemetry.drv_turnRate * rot_scale_factor
+
+            if abs(rot_value) > rot_arc_limit:
+                if rot_value > 0:
+                    rot_value = rot_arc_limit
+                else:
+                    rot_value = -rot_arc_limit
+
+            rects = [
+                draw_arc(screen, WHITE, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90-rot_arc_limit), (90+rot_arc_limit), (rot_arc_back_thickness-2)),
+                draw_ticks_out(screen, WHITE, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90-20*rot_scale_factor), (90+20*rot_scale_factor), 5, rot_tick_long_length, rot_tick_thickness),
+                draw_ticks_out(screen, WHITE, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90-6*rot_scale_factor), (90+6*rot_scale_factor), 9, rot_tick_short_length, rot_tick_thickness),
+                draw_ticks_out(screen, WHITE, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90-6*rot_scale_factor), (90+6*rot_scale_factor), 5, rot_tick_long_length, rot_tick_thickness),
+            ]
+
+            if rot_value > 0:
+                rects.append(draw_arc(screen, BOEING_GREEN, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90), (90+rot_value), (rot_arc_front_thickness-2)))
+            if rot_value < 0:
+                rects.append(draw_arc(screen, BOEING_GREEN, (rot_arc_center_x, rot_arc_center_y), rot_arc_radius, (90+rot_value), (90), (rot_arc_front_thickness-2)))
+            return rects
+
+    def draw_compass_pointer(self, telemetry, settings):
+        screen = self.screen
+        # Compass Pointer
+        if telemetry.magStatus:
+            return [screen.blit(self.pfd_compass_pointer, pfdCompass_pointer_pos)]
+
+    def draw_vsi_readout(self, telemetry, settings):
+        screen = self.screen
+        # Vertical Speed Indicator
+        if telemetry.pressStatus:
+            vspd_ind_min_value = 300    # Threshold absolute value to display
+
+            vspd_ind_value = round(telemetry.drv_baroVspdFpm / 50) * 50
+            if vspd_ind_value >= 9999:
+                vspd_ind_value = 9999
+            if vspd_ind_value <= -9999:
+                vspd_ind_value = -9999
+
+            if vspd_ind_value >= vspd_ind_min_value:
+                return [self.pfdVspdDigits.blit(screen, format(vspd_ind_value), 752, 200)]
+            if vspd_ind_value <= -vspd_ind_min_value:
+                return [self.pfdVspdDigits.blit(screen, format(vspd_ind_value), 752, 635)]
+
+    def draw_speed_readout(self, telemetry, settings):
+        screen = self.screen
+        rects = []
+        # Speed Indicator
+        if telemetry.diffStatus:
+            rects.append(screen.blit(self.pfd_spd_pointer, pfd_spd_pointer_pos))
+            rects.append(self.pfdSpdDigits.blit(screen, format(round(self.spd_tape_value)), *pfdSpdTextPos))
+
+        # Mach Indicator
+        if telemetry.diffStatus & (int(telemetry.drv_kias) >= mach_transition):
+            pfdMachFormatted = "{:.3f}".format(round(telemetry.drv_mach, 3))
+            if pfdMachFormatted.startswith("0."):
+                pfdMachFormatted = pfdMachFormatted[1:]
+            rects.append(self.pfdMachDigits.blit(screen, pfdMachFormatted, *pfdMachTextPos))
+        return rects
+
+    def draw_altitude_readout(self, telemetry, settings):
+        screen = self.screen
+        # Altitude Indicator
+        if telemetry.pressStatus:
+            return [screen.blit(self.pfd_alt_pointer, pfd_alt_pointer_pos),
+                    self.pfdAltDigits.blit(screen, format(int(round(self.alt_tape_value, -1))), *pfdAltTextPos)]
+
+    # Values the altimeter setting is drawn from, the transition and standby state before drawing included
+    def altimeter_setting_inputs(self, telemetry, settings):
+        return (telemetry.pressStatus, telemetry.set_altStd, telemetry.set_altStg, self.alt_stg_prev_alt_stg, self.alt_stg_stby_buffer,
+                self.transition_buffer_trl_ta, self.transition_buffer_ta_trl, settings.menu_pfd_altStgUnit,
+                int(telemetry.drv_indAltFt) < settings.menu_pfd_ta, int(telemetry.drv_indAltFt/100) > settings.menu_pfd_trl)
+
+    def draw_altimeter_setting(self, telemetry, settings):
+        screen = self.screen
+        rects = []
+        # Altimeter Settings
+        if telemetry.pressStatus:
+            if telemetry.set_altStd == True:
+                if (int(telemetry.drv_indAltFt/100) > settings.menu_pfd_trl) or self.transition_buffer_ta_trl:
+                    pfdAltStd = self.pfdAltStdFont.render("STD", True, BOEING_GREEN)
+                else:
+                    pfdAltStd = self.pfdAltStdFont.render("STD", True, BOEING_AMBER)
+                    self.transition_buffer_trl_ta = True
+                rects.append(screen.blit(pfdAltStd, (653, 755)))
+
+                if (round(telemetry.set_altStg, 1) != round(self.alt_stg_prev_alt_stg, 1)):
+                    self.alt_stg_stby_buffer = True
+
+                if self.alt_stg_stby_buffer:
+                    if settings.menu_pfd_altStgUnit == True:
+                        pfdAltStgStby = f"{round(telemetry.set_altStg/100)} HPA"
+                    else:
+                        pfdAltStgStby = "{:.2f} IN.".format(round(telemetry.set_altStg/100*constHpaToInhg, 2))
+                    rects.append(self.pfdAltStgStbyDigits.blit(screen, pfdAltStgStby, 646, 785))
+            else:
+                self.alt_stg_stby_buffer = False
+                if (int(telemetry.drv_indAltFt) < settings.menu_pfd_ta) or self.transition_buffer_trl_ta:
+                    if settings.menu_pfd_altStgUnit == True:
+                        pfdAltStgDigits, pfdAltStg = self.pfdAltStgGreenDigits, format(round(telemetry.set_altStg/100))
+                        pfdAltStgUnit = self.pfdAltStgUnitFont.render("HPA", True, BOEING_GREEN)
+                    else:
+                        pfdAltStgDigits, pfdAltStg = self.pfdAltStgGreenDigits, "{:.2f}".format(round(telemetry.set_altStg/100*constHpaToInhg, 2))
+                        pfdAltStgUnit = self.pfdAltStgUnitFont.render("IN.", True, BOEING_GREEN)
+                else:
+                    if settings.menu_pfd_altStgUnit == True:
+                        pfdAltStgDigits, pfdAltStg = self.pfdAltStgAmberDigits, format(round(telemetry.set_altStg/100))
+                        pfdAltStgUnit = self.pfdAltStgUnitFont.render("HPA", True, BOEING_AMBER)
+                        self.transition_buffer_ta_trl = True
+                    else:
+                        pfdAltStgDigits, pfdAltStg = self.pfdAltStgAmberDigits, "{:.2f}".format(round(telemetry.set_altStg/100*constHpaToInhg, 2))
+                        pfdAltStgUnit = self.pfdAltStgUnitFont.render("IN.", True, BOEING_AMBER)
+                        self.transition_buffer_ta_trl = True
+                rects.append(screen.blit(pfdAltStgUnit, (720, 762)))
+                rects.append(pfdAltStgDigits.blit(screen, pfdAltStg, 638, 760))
+            if  int(telemetry.drv_indAltFt) < settings.menu_pfd_ta or int(telemetry.drv_indAltFt/100) > settings.menu_pfd_trl:
+                self.transition_buffer_trl_ta = False
+                self.transition_buffer_ta_trl = False
+            self.alt_stg_prev_alt_stg = telemetry.set_altStg   
+        return rects
+
+    def draw_aoa(self, telemetry, settings):
+        screen = self.screen
+        # Angle of Attack Indicator
+        if True:
+            aoa_indicator_value = telemetry.aoa_angle * aoa_scale_factor
+            if aoa_indicator_value < aoa_arc_start_angle:
+                aoa_indicator_value = aoa_arc_start_angle
+            if aoa_indicator_value > aoa_arc_end_angle:
+                aoa_indicator_value = aoa_arc_end_angle
+
+            return [draw_arc(screen, WHITE, aoa_indicator_pos, aoa_arc_radius, aoa_arc_start_angle, aoa_arc_end_angle, aoa_thickness-2),
+                    draw_ticks_in(screen, WHITE, aoa_indicator_pos, aoa_arc_radius, aoa_arc_start_angle, aoa_arc_end_angle, aoa_tick_count, aoa_tick_length, aoa_thickness),
+                    draw_hand(screen, WHITE, aoa_indicator_pos, aoa_arc_radius, aoa_indicator_value, aoa_needle_thickness),
+                    self.pfdAoaDigits.blit(screen, format(round(aoa_indicator_value/aoa_scale_factor, 1), '.1f'), *pfdAoaTextPos)]
+
+    def draw_g_meter(self, telemetry, settings):
+        screen = self.screen
+        # Vertical G Indicator
+        if telemetry.imuStatus:
+            if telemetry.imu_ay > self.g_peak_max:
+                self.g_peak_max = telemetry.imu_ay
+
+            if telemetry.imu_ay < self.g_peak_min:
+                self.g_peak_min = telemetry.imu_ay
+
+            pfd_g_peak_max_indicator_value = -(self.g_peak_max-1) * g_scale_factor + 180
+            if pfd_g_peak_max_indicator_value < g_arc_start_angle:
+                pfd_g_peak_max_indicator_value = g_arc_start_angle
+            if pfd_g_peak_max_indicator_value > g_arc_end_angle:
+                pfd_g_peak_max_indicator_value = g_arc_end_angle
+
+            pfd_g_peak_min_indicator_value = -(self.g_peak_min-1) * g_scale_factor + 180
+            if pfd_g_peak_min_indicator_value < g_arc_start_angle:
+                pfd_g_peak_min_indicator_value = g_arc_start_angle
+            if pfd_g_peak_min_indicator_value > g_arc_end_angle:
+                pfd_g_peak_min_indicator_value = g_arc_end_angle
+
+            g_indicator_value = -(telemetry.imu_ay-1) * g_scale_factor + 180
+            if g_indicator_value < g_arc_start_angle:
+                g_indicator_value = g_arc_start_angle
+            if g_indicator_value > g_arc_end_angle:
+                g_indicator_value = g_arc_end_angle     
+
+            return [self.pfdGDigits.blit(screen, "0", g_indicator_pos_x-10, g_indicator_pos_y+8),
+                    self.pfdGDigits.blit(screen, "2", g_indicator_pos_x-10, g_indicator_pos_y-30),
+                    draw_ticks_in(screen, WHITE, (g_indicator_pos_x, g_indicator_pos_y), g_arc_radius, g_arc_start_angle, g_arc_end_angle, g_tick_count, g_tick_length, g_thickness),
+                    draw_ticks_out(screen, BOEING_GREEN, (g_indicator_pos_x, g_indicator_pos_y), g_arc_radius, pfd_g_peak_max_indicator_value, pfd_g_peak_min_indicator_value, 2, g_peak_tick_length, g_thickness),
+                    draw_arc(screen, WHITE, (g_indicator_pos_x, g_indicator_pos_y), g_arc_radius, g_arc_start_angle, g_arc_end_angle, g_thickness-2),
+                    draw_hand(screen, WHITE, (g_indicator_pos_x, g_indicator_pos_y), g_arc_radius, g_indicator_value, g_needle_thickness),
+                    self.pfdGDigits.blit(screen, format(round(telemetry.imu_ay, 1), '.1f'), *pfdGTextPos)]
+
+    def draw_flags(self, telemetry, settings):
+        screen = self.screen
+        # # Heading [TEST]
+        # pfdHdg = self.pfdHdgFont.render(format(round(telemetry.drv_magUncorrHdg)), True, WHITE)
+        # screen.blit(pfdHdg, (388, 50))
+
+        rects = []
+        # Flags: sensor flags are in the static layers, see _build_layers()
+        if telemetry.messageInterval > self.data_low_rate_thr:
+            rects.append(screen.blit(self.pfd_flag_data_rate, pfd_flag_data_rate_pos))
+
+        # Error Messages
+        if self.data_timeout:
+            pfdDataTimeout = self.pfdDataTimeoutFont.render("DATA TIMEOUT", True, BOEING_RED)    # Yazıyı render et           
+            text_rect = pfdDataTimeout.get_rect()               # Yazının boyutlarını al
+            text_rect.center = pfdDataTimeoutPos                # Pozisyonu yazının merkezine göre ayarla     
+            background_rect = text_rect.inflate(10, 5)          # Arka planın boyutunu yazıya göre biraz daha büyük yap        
+            rects.append(pygame.draw.rect(screen, BLACK, background_rect))  # Arka planı çiz       
+            screen.blit(pfdDataTimeout, text_rect)              # Yazıyı çiz
+        return rects
@@ -0,0 +1,253 @@
+# IboSoft EFIS Display Software
+# Replay of recorded ADU streams
+#   ReplayPort looks like a pyserial port to SerialReader and plays a recording back with the timing
+#   it was received with, so replayed data goes through the same decoder, parser and snapshot path as
+#   live data. Sources are flight recorder logs (.efr) and text captures of the MCU output (frames
+#   spaced by their '/i=' loop time, 100 ms without one).
+#   Pacing: speed 1 real time, up to 100 accelerated, 0 as fast as possible. pause(), resume() and
+#   seek() work while playing.
+#
+#   PORT_NUM: replay://recordings/flight_20240417_185100.efr?speed=4&loop=1  (in config.ini)
+#   python replay.py LOG [speed]   Ingest throughput of a recording, speed 0 by default
+
+# Libraries
+import bisect                   # Internal
+import sys                      # Internal
+import threading                # Internal
+import time                     # Internal
+import urllib.parse             # Internal
+from flight_recorder import FlightLog, frameKindAscii
+from adu_protocol import cobs_encode
+from serial_link import FrameDecoder
+
+# --------------------
+# Sources
+#   Return (frames, duration, protocol): frames(t) iterates the receive time (s from the first frame)
+#   and wire bytes of each frame from recording time t on, times ascending; duration is the time of the
+#   last frame; protocol is the one SerialReader should start with: 'binary' for a recording that
+#   starts with binary frames, 'auto' for one that switches, 'ascii' for text captures.
+
+def wire_bytes(kind, frame):
+    if kind == frameKindAscii:
+        return b'#\r\n' + frame + b'\r\n+\r\n'
+    return cobs_encode(frame) + b'\x00'
+
+# Flight recorder logs are streamed a chunk at a time and seek through the chunk index, so a long log
+# plays and seeks without being read whole
+def load_flight_log(path):
+    log = FlightLog(path)
+    first_time = log.first_time
+    protocol = 'binary' if log.index and log.read_chunk(0)[0][1] != frameKindAscii else 'auto'
+
+    def frames(t):
+        for receive_time, kind, frame in log.frames(first_time + t):
+            yield receive_time - first_time, wire_bytes(kind, frame)
+    return frames, log.duration, protocol
+
+def load_text_capture(path, default_interval=0.1):
+    with open(path, 'rb') as file:
+        data = file.read()
+    data = data.replace(b'\r\n', b'\n').replace(b'\n', b'\r\n')
+    decoder = FrameDecoder()
+    decoder.feed(data)
+    times = []
+    chunks = []
+    frame_time = 0.0
+    for frame_lines in decoder.frames():
+        interval = default_interval
+        for line in frame_lines:
+            if line.startswith(b'/i='):
+                try:
+                    interval = int(line[3:]) / 1000 or default_interval
+                except ValueError:
+                    pass
+                break
+        if times:
+            frame_time += interval
+        times.append(frame_time)
+        chunks.append(b'\r\n'.join([b'#', *frame_lines, b'+']) + b'\r\n')
+
+    def frames(t):
+        for position in range(bisect.bisect_left(times, t), len(times)):
+            yield times[position], chunks[position]
+    return frames, times[-1] if times else 0.0, 'ascii'
+
+def load_recording(path):
+    if path.endswith('.efr'):
+        return load_flight_log(path)
+    return load_text_capture(path)
+
+# --------------------
+# Replay Port
+#   Frames are taken from the source as they fall due; one frame is read ahead to know when the next
+#   is due.
+
+class ReplayPort:
+    def __init__(self, frames, duration, protocol='auto', speed=1.0, loop=False, timeout=0.1):
+        self.frames = frames            # Source, frames(t) -> (time, wire bytes) from recording time t on
+        self.duration = duration        # s, recording time of the last frame
+        self.protocol = protocol        # Protocol for the SerialReader
+        self.speed = speed              # Playback speed, 0: as fast as possible
+        self.loop = loop                # Start over at the end
+        self.timeout = timeout          # s, read() timeout like pyserial's
+        self.is_open = True
+        self.paused = False
+        self.sent_frames = 0            # Frames moved to the read buffer
+        self.sent_bytes = 0
+        self._frames = frames(0.0)      # Iterator of the frames still to send, None at the end
+        self._next = None               # Next frame to send, read ahead
+        self._start_wall = time.monotonic()     # Wall time of recording time 0 at the current speed
+        self._buffer = bytearray()
+        self._changed = threading.Condition()   # Guards the source too, it is read on the reader and PFD threads
+
+    # Recording time (s) of the next frame
+    @property
+    def position(self):
+        with self._changed:
+            return self._position()
+
+    # Nothing left to read and no loop
+    @property
+    def finished(self):
+        with self._changed:
+            return self._peek() is None and not self._buffer and not self.loop
+
+    # SerialReader port factory: reopening after a close continues where it stopped
+    def open(self, port_num=None, baud_rate=None, timeout=None):
+        with self._changed:
+            if timeout is not None:
+                self.timeout = timeout
+            self.is_open = True
+            self._restart_clock()
+        return self
+
+    def close(self):
+        with self._changed:
+            self.is_open = False
+            self._changed.notify_all()
+
+    def cancel_read(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def write(self, data):
+        return len(data)    # Settings for the MCU are dropped
+
+    def pause(self):
+        with self._changed:
+            self.paused = True
+
+    def resume(self):
+        with self._changed:
+            self.paused = False
+            self._restart_clock()
+            self._changed.notify_all()
+
+    def set_speed(self, speed):
+        with self._changed:
+            self.speed = speed
+            self._restart_clock()
+            self._changed.notify_all()
+
+    # Moves to recording time 't' (s), clamped to the recording
+    def seek(self, t):
+        with self._changed:
+            self._frames = self.frames(max(0.0, t))
+            self._next = None
+            del self._buffer[:]
+            self._restart_clock()
+            self._changed.notify_all()
+
+    @property
+    def in_waiting(self):
+        with self._changed:
+            self._take_due(time.monotonic())
+            return len(self._buffer)
+
+    def read(self, size=1):
+        deadline = time.monotonic() + self.timeout
+        with self._changed:
+            while True:
+                now = time.monotonic()
+                self._take_due(now)
+                if self._buffer or not self.is_open or now >= deadline:
+                    break
+                wait = deadline - now
+                frame = self._peek()
+                if not self.paused and frame is not None and self.speed:
+                    wait = min(wait, self._due_time(frame[0]) - now)
+                self._changed.wait(max(wait, 0.0005))
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            return data
+
+    def _peek(self):
+        if self._next is None and self._frames is not None:
+            self._next = next(self._frames, None)
+            if self._next is None:
+                self._frames = None
+        return self._next
+
+    def _position(self):
+        frame = self._peek()
+        return frame[0] if frame is not None else self.duration
+
+    def _restart_clock(self):
+        if self.speed:
+            self._start_wall = time.monotonic() - self._position() / self.speed
+
+    def _due_time(self, t):
+        return self._start_wall + t / self.speed
+
+    # Moves the frames due by 'now' to the read buffer
+    def _take_due(self, now):
+        if self.paused or not self.is_open:
+            return
+        if self._peek() is None and self.loop:
+            self._frames = self.frames(0.0)
+            self._start_wall = now
+        count = 0
+        while (frame := self._peek()) is not None:
+            if not self.speed:
+                if count == 64:     # As fast as possible, a batch per read
+                    break
+            elif frame[0] > (now - self._start_wall) * self.speed:
+                break
+            self._buffer += frame[1]
+            self._next = None
+            count += 1
+            self.sent_bytes += len(frame[1])
+        self.sent_frames += count
+
+# 'replay://path?speed=4&loop=1'
+def open_replay_url(url):
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qs(parts.query)
+    path = urllib.parse.unquote(parts.netloc + parts.path)
+    frames, duration, protocol = load_recording(path)
+    return ReplayPort(frames, duration, protocol, speed=float(query.get('speed', ['1'])[0]), loop=query.get('loop', ['0'])[0] == '1')
+
+# --------------------
+# Ingest Throughput
+
+if __name__ == '__main__':
+    from serial_link import SerialReader
+
+    if len(sys.argv) < 2:
+        print("python replay.py LOG [speed]")
+        sys.exit(1)
+    frames, duration, protocol = load_recording(sys.argv[1])
+    port = ReplayPort(frames, duration, protocol, speed=float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
+    reader = SerialReader(sys.argv[1], 0, protocol=protocol, port_factory=port.open)
+    start = time.monotonic()
+    reader.start()
+    while not port.finished:
+        time.sleep(0.001)
+    time.sleep(0.05)    # Last read in the reader
+    reader.stop()
+    if reader.last_frame_time is None:
+        print(f"No frames decoded from {sys.argv[1]} ({port.sent_frames} frames, {port.sent_bytes} bytes replayed)")
+        sys.exit(1)
+    elapsed = reader.last_frame_time - start
+    print(f"{reader.stats.frames} frames, {port.sent_bytes} bytes in {elapsed:.2f} s: {reader.stats.frames/elapsed:.0f} frames/s, "
+          f"{port.sent_bytes/elapsed/1e6:.1f} MB/s ({port.duration:.1f} s recording, {port.duration/elapsed:.1f}x)")
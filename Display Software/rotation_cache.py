@@ -0,0 +1,84 @@
+# IboSoft EFIS Display Software
+# Rotation cache
+#   Rotated sprites are kept in a least recently used cache keyed by sprite and angle quantized to
+#   'resolution' degrees, within a memory budget. A rotated sprite is trimmed to its visible pixels and to
+#   'clip' if given, so a pointer at the end of a long transparent sprite costs a few kB.
+#   blit() places a sprite for the exact angle: the difference to the quantized angle moves the trimmed
+#   sprite around the pivot instead of rotating it again.
+
+# Libraries
+import collections              # Internal
+import math                     # Internal
+import pygame                   # External
+
+# --------------------
+# Cache
+
+class RotationCache:
+    def __init__(self, resolution=0.5, budget=64*2**20):
+        self.resolution = resolution    # deg
+        self.budget = budget            # Bytes
+        self.size = 0                   # Bytes of the cached surfaces
+        self.entries = collections.OrderedDict()    # (key, quantum) -> (surface, top left from the pivot, bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, angle):
+        return round(angle / self.resolution)
+
+    # 'surface' rotated by 'quantum' steps about its center. 'clip' is the area to keep relative to the center.
+    def get(self, key, surface, quantum, clip=None):
+        entry = self.entries.get((key, quantum))
+        if entry is not None:
+            self.entries.move_to_end((key, quantum))
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self._rotate(surface, quantum * self.resolution, clip)
+        self.entries[(key, quantum)] = entry
+        self.size += entry[2]
+        while self.size > self.budget and len(self.entries) > 1:
+            evicted = self.entries.popitem(last=False)[1]
+            self.size -= evicted[2]
+        return entry
+
+    # Blits 'surface' rotated by 'angle' (deg, counterclockwise like pygame.transform.rotate) with its center
+    # at 'pivot'; returns the rectangle drawn
+    def blit(self, dest, key, surface, angle, pivot, clip=None):
+        quantum = self.quantize(angle)
+        rotated, (x, y), size = self.get(key, surface, quantum, clip)
+        # Rest of the angle: the trimmed sprite's center turns around the pivot
+        center_x = x + rotated.get_width() / 2
+        center_y = y + rotated.get_height() / 2
+        rest = math.radians(angle - quantum * self.resolution)
+        dx = center_x*math.cos(rest) + center_y*math.sin(rest) - center_x
+        dy = -center_x*math.sin(rest) + center_y*math.cos(rest) - center_y
+        return dest.blit(rotated, (round(pivot[0] + x + dx), round(pivot[1] + y + dy)))
+
+    # Rotates 'surface' for every quantum from 'low' to 'high' (deg), nearest 0 first, while it fits in the
+    # budget; returns the number of rotations cached
+    def prewarm(self, key, surface, low=-60, high=60, clip=None):
+        quanta = sorted(range(self.quantize(low), self.quantize(high) + 1), key=abs)
+        count = 0
+        for quantum in quanta:
+            if (key, quantum) in self.entries:
+                continue
+            entry = self._rotate(surface, quantum * self.resolution, clip)
+            if self.size + entry[2] > self.budget:
+                break
+            self.entries[(key, quantum)] = entry
+            self.size += entry[2]
+            count += 1
+        return count
+
+    def _rotate(self, surface, angle, clip):
+        rotated = pygame.transform.rotate(surface, angle)
+        center = (rotated.get_width() // 2, rotated.get_height() // 2)     # Where get_rect(center=) puts it
+        area = rotated.get_bounding_rect()
+        if clip is not None:
+            area = area.clip(pygame.Rect(clip).move(center))
+        trimmed = rotated.subsurface(area).copy()
+        if pygame.display.get_surface() is not None:
+            trimmed = trimmed.convert_alpha() if trimmed.get_flags() & pygame.SRCALPHA else trimmed.convert()
+        size = trimmed.get_width() * trimmed.get_height() * trimmed.get_bytesize()
+        return trimmed, (area.left - center[0], area.top - center[1]), size
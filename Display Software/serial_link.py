@@ -0,0 +1,523 @@
+# IboSoft EFIS Display Software
+# Serial link to the Air Data Unit (ADU)
+
+# Libraries
+import collections              # Internal
+import logging                  # Internal
+import random                   # Internal
+import threading                # Internal
+import time                     # Internal
+import serial                   # pyserial, external
+from telemetry import Telemetry, parse_frame, fieldBits, allFieldsMask
+from adu_protocol import BinaryFrameDecoder, format_rate_table
+
+# --------------------
+# Link Statistics
+#   Counters of the ingest path. Each counter has a single writer thread; readers only sample them.
+
+class LinkStats:
+    __slots__ = ('bytes', 'frames', 'bad_frames', 'lost_frames', 'bad_lines', 'undecodable_bytes', 'serial_errors', 'read_timeouts',
+                 'conflated_frames',
+                 'uplink_writes', 'uplink_retries', 'uplink_rtt', 'keyframe_requests', 'late_fields',
+                 'ingest_time', 'parse_time')
+
+    def __init__(self):
+        self.bytes = 0                  # Bytes read from the port
+        self.frames = 0                 # Complete frames decoded
+        self.bad_frames = 0             # Truncated, oversized or CRC failed frames dropped by the decoder
+        self.lost_frames = 0            # Frames missing from the binary sequence numbers
+        self.bad_lines = 0              # Lines dropped by the parser (no '=', unreadable value)
+        self.undecodable_bytes = 0      # Bytes of dropped non-ASCII lines
+        self.serial_errors = 0          # SerialExceptions that closed the port
+        self.read_timeouts = 0          # Link stalls: no byte within the read deadline
+        self.conflated_frames = 0       # Frames superseded by a newer frame from the same read (reader thread)
+        self.uplink_writes = 0          # Settings batches written (under the uplink lock)
+        self.uplink_retries = 0         # Commands resent after ack_timeout without an echo
+        self.uplink_rtt = None          # s, last send-to-echo time of a setting
+        self.keyframe_requests = 0      # '!kfr' sent after a binary sequence gap
+        self.late_fields = 0            # Subscribed field updates later than fieldLateFactor x their interval
+        self.ingest_time = 0.0          # s, reader thread time from read data to decoded frames
+        self.parse_time = 0.0           # s, reader thread time parsing and publishing frames
+
+# --------------------
+# Frame Decoder
+#   Incremental decoder for the ASCII frames of dataOut(). Raw bytes are appended to one reusable
+#   buffer and every complete '#' ... '+' frame is handed back as a list of lines (bytes, no CR/LF).
+#   Lines are not decoded; float()/int() accept bytes directly. A frame cut short by a new '#' or
+#   growing past max_buffer is dropped and counted in stats.bad_frames.
+
+frameHead = b'#\r\n'
+frameNextHead = b'\n#\r\n'
+frameEnd = b'\n+\r\n'
+
+class FrameDecoder:
+    def __init__(self, stats=None, max_buffer=16384):
+        self.stats = stats if stats is not None else LinkStats()
+        self.max_buffer = max_buffer    # bytes, buffered data without a frame end is dropped above this
+        self._buffer = bytearray()
+
+    def reset(self):
+        del self._buffer[:]
+
+    def feed(self, data):
+        self._buffer += data
+
+    def parse(self, record, frame_lines):
+        return parse_frame(record, frame_lines, self.stats)
+
+    def frames(self):
+        buffer = self._buffer
+        frames = []
+        pos = 0
+        while True:
+            start = buffer.find(frameHead, pos)
+            if start < 0:
+                break
+            if start > 0 and buffer[start - 1] != 0x0A:     # '#' is not at the start of a line
+                pos = start + 1
+                continue
+            end = buffer.find(frameEnd, start + 2)
+            next_start = buffer.find(frameNextHead, start + 2, end if end >= 0 else len(buffer))
+            if next_start >= 0:     # Frame cut short, resync to the next head
+                self.stats.bad_frames += 1
+                pos = next_start + 1
+                continue
+            if end < 0:
+                break
+            if end - 1 > start + 3:
+                frames.append(bytes(buffer[start + 3:end - 1]).split(b'\r\n'))
+            else:
+                frames.append([])      # Empty frame
+            pos = end + len(frameEnd)
+
+        if start < 0:
+            # No frame head left, only keep what could be the beginning of one
+            pos = max(pos, len(buffer) - len(frameHead) + 1)
+        elif pos < start:
+            pos = start
+        if pos > 0:
+            del buffer[:pos]
+        if len(buffer) > self.max_buffer:
+            self.stats.bad_frames += 1
+            del buffer[:]
+        self.stats.frames += len(frames)
+        return frames
+
+# --------------------
+# Settings Uplink
+#   Settings the MCU should hold. A command whose value differs from the MCU's echo ('!asd=' and '!atg='
+#   lines of the newest frame) is sent; all due commands go out in one '#' ... '+' write. An echo equal
+#   to the sent value is the acknowledgement and gives the round-trip time, a command still not echoed
+#   after ack_timeout is sent again. Commands without an echo ('!bin', '!kfr') are sent once. '!clk' is
+#   sent once in a message of its own without a line end: the MCU copies its value up to the '+' into a
+#   buffer that has no room for one. The '!rat' table goes in messages of its own, split by field.
+#   The MCU collects a message in a 64 byte buffer that wraps around, so no message is longer than
+#   uplinkMessageSize; more commands go out as more messages in the same write.
+
+uplinkHead = b'...\r\n#\r\n'
+uplinkEnd = b'+\r\n+\r\n'
+uplinkMessageSize = 61      # Bytes of commands in a message: settingsBuffer (64) less the head's line end and the terminator
+
+# Command -> (value to text, echo matches value)
+uplinkCommands = {
+    'asd': (lambda value: str(int(value)), lambda record, value: record.set_altStd == bool(value)),
+    'atg': (lambda value: str(float(value)), lambda record, value: abs(record.set_altStg - value) < 0.5),   # Pa, echo has 2 decimals
+}
+
+class SettingsUplink:
+    def __init__(self, stats=None, ack_timeout=0.5):
+        self.stats = stats if stats is not None else LinkStats()
+        self.ack_timeout = ack_timeout  # s, resend a command not echoed within this
+        self._desired = {}              # Command -> value
+        self._sent = {}                 # Command -> (value, time.monotonic() of the last send), until echoed
+        self._once = {}                 # Command -> value text, sent once without an ack
+        self._messages = []             # Command texts sent once in a message of their own
+        self._lock = threading.Lock()   # set() runs on the PFD thread, batch() on the reader thread
+
+    # Returns True if the value changed
+    def set(self, command, value):
+        with self._lock:
+            changed = self._desired.get(command) != value
+            self._desired[command] = value
+            return changed
+
+    def send_once(self, command, value):
+        with self._lock:
+            self._once[command] = value
+
+    def send_message(self, command, value):
+        with self._lock:
+            self._messages.append(f"!{command}={value}")
+
+    def set_clock(self, time_utc):
+        self.send_message('clk', time_utc.strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+    # Rate table (field name -> s) as '!rat=' messages; fields not in the table keep their rate, so it
+    # can be split anywhere between fields
+    def send_rates(self, rates):
+        texts = []
+        for pair in format_rate_table(rates).split(','):
+            if texts and len(texts[-1]) + 1 + len(pair) <= uplinkMessageSize:
+                texts[-1] += ',' + pair
+            else:
+                texts.append('!rat=' + pair)
+        with self._lock:
+            self._messages += texts
+
+    # Returns the bytes to write for the due commands against the echo in 'record', or None
+    def batch(self, record, now):
+        lines = []
+        with self._lock:
+            for command, value in self._desired.items():
+                format_value, is_echoed = uplinkCommands[command]
+                sent = self._sent.get(command)
+                if is_echoed(record, value):
+                    if sent is not None:
+                        if sent[0] == value:
+                            self.stats.uplink_rtt = now - sent[1]
+                        del self._sent[command]
+                    continue
+                if sent is not None and sent[0] == value:
+                    if now - sent[1] < self.ack_timeout:
+                        continue    # Waiting for the echo
+                    self.stats.uplink_retries += 1
+                    logging.warning(f"Uplink !{command} not acknowledged, resending")
+                lines.append(f"!{command}={format_value(value)}\r\n")
+                self._sent[command] = (value, now)
+            for command, value in self._once.items():
+                lines.append(f"!{command}={value}\r\n")
+            self._once.clear()
+            bodies = []
+            for line in lines:
+                if bodies and len(bodies[-1]) + len(line) <= uplinkMessageSize:
+                    bodies[-1] += line
+                else:
+                    bodies.append(line)
+            bodies += self._messages
+            self._messages.clear()
+            if not bodies:
+                return None
+            self.stats.uplink_writes += 1
+        return b"".join(uplinkHead + body.encode('ascii') + uplinkEnd for body in bodies)
+
+# --------------------
+# Serial Reader
+#   Owns the serial port on its own thread. Everything waiting on the port is read in one call and
+#   fed to a FrameDecoder, and every frame is parsed into a back buffer Telemetry record. After each
+#   read the back buffer is published to 'snapshot' with one reference swap and a copy becomes the
+#   new back buffer, so the render loop takes a consistent record without locking and never works
+#   through a backlog. Frames superseded within one read are counted as conflated and, if enabled,
+#   kept in 'history'. A FlightRecorder given as 'recorder' gets every frame with its receive time.
+#   The thread sleeps in a blocking read() until data arrives or read_timeout passes without a byte,
+#   so waiting for the MCU costs no CPU and data is handled as soon as it arrives.
+#   The settings uplink is serviced on this thread only: after each published frame, whose echo
+#   acknowledges it, and when the PFD posts a changed setting. Posting only stores the setting and
+#   wakes the blocking read (cancel_read()), so the PFD never waits on the port.
+#   With protocol 'auto' the link starts in ASCII with the data also fed to a BinaryFrameDecoder; after
+#   the first frame '!bin=1' ('!bin=2' with delta frames) is sent. The first good binary frame
+#   switches the link to binary, no binary frame within negotiate_timeout keeps ASCII. 'ascii' and
+#   'binary' fix the protocol; with 'binary' the '!bin' request is sent as soon as the port opens and
+#   every negotiate_timeout until the first good binary frame. In binary mode a sequence gap sends
+#   '!kfr=1', repeated every ack_timeout until a keyframe arrives.
+#   subscribe() sets the send interval of fields. The table goes to the MCU as '!rat=' after the first
+#   frame of every connection and on change, and the receive time of each subscribed field is tracked
+#   against its interval (field_age(), stale_fields(), stats.late_fields). In binary mode a frame
+#   without a sequence gap updates every field: delta frames leave out the unchanged ones.
+#   Only a SerialException closes the port; it is reopened on this thread with jittered exponential
+#   backoff between reconnect_delay_min and reconnect_delay_max, while the PFD keeps rendering with
+#   DATA TIMEOUT shown.
+
+fieldLateFactor = 3     # A subscribed field is late or stale after this many intervals without an update
+
+class SerialReader(threading.Thread):
+    def __init__(self, port_num, baud_rate, read_timeout=0.5, reconnect_delay_min=0.25, reconnect_delay_max=5, history_length=0,
+                 protocol='auto', negotiate_timeout=1.0, delta=True, recorder=None, port_factory=serial.serial_for_url):
+        super().__init__(name="SerialReader", daemon=True)
+
+        self.port_num = port_num
+        self.baud_rate = baud_rate
+        self.read_timeout = read_timeout            # s, read deadline, a link stall is reported after this
+        self.reconnect_delay_min = reconnect_delay_min  # s
+        self.reconnect_delay_max = reconnect_delay_max  # s
+        self.reconnect_attempts = 0                     # Failed attempts since the last good frame
+        self.protocol_setting = protocol                # 'auto', 'ascii' or 'binary'
+        self.negotiate_timeout = negotiate_timeout      # s, wait for the first binary frame after '!bin=1'
+        self.delta = delta                              # Ask for delta frames in binary mode
+        self.protocol = None                            # Protocol in use on the open port
+
+        self.stats = LinkStats()
+        self.decoder = None                         # FrameDecoder or BinaryFrameDecoder of the open port
+        self.uplink = SettingsUplink(self.stats)
+        self.snapshot = Telemetry()                 # Published record, never written after publishing
+        self.last_frame_time = None                 # time.monotonic() of the last complete frame
+        self.connections = 0                        # Ports opened, the PFD posts the clock once per connection
+        self.history = collections.deque(maxlen=history_length) if history_length else None   # (receive time, frame)
+        self.recorder = recorder                    # FlightRecorder, gets every frame received
+        self.port_factory = port_factory            # (port, baud rate, timeout=) -> port; a ReplayPort's open() for replay
+        self._back = Telemetry()                    # Record being filled by the parser
+        self.rates = {}                             # Field name -> send interval (s), the '!rat' table
+        self._tracked = ()                          # (name, bit, interval) of the subscribed fields
+        self._field_times = {}                      # Field name -> time.monotonic() of its last update
+        self._rates_due = False                     # Table not yet sent on this connection
+
+        self._ser = None
+        self._stalled = False
+        self._talking = False                       # A frame arrived on this connection
+        self._uplink_due = threading.Event()        # Set by the PFD after posting a setting
+        self._probe = None                          # BinaryFrameDecoder during negotiation
+        self._probe_deadline = None
+        self._binary_pending = False                # Fixed binary mode, no binary frame yet on this connection
+        self._binary_request_time = float('-inf')
+        self._keyframe_request_time = float('-inf')
+        self._port_lock = threading.Lock()          # Guards open/close/write against each other
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        ser = self._ser
+        if ser is not None and hasattr(ser, 'cancel_read'):
+            ser.cancel_read()   # Wake the blocking read
+
+    def is_connected(self):
+        ser = self._ser
+        return ser is not None and ser.is_open
+
+    # Posts a setting for the MCU ('asd', 'atg'); the reader sends it at once if it changed and the MCU is talking
+    def post_setting(self, command, value):
+        if self.uplink.set(command, value):
+            self._wake_uplink()
+
+    # Posts the UTC time for the MCU's RTC, sent once
+    def post_clock(self, time_utc):
+        self.uplink.set_clock(time_utc)
+        self._wake_uplink()
+
+    # Sets the send interval (s) of the fields (Telemetry names). None returns them to the loop rate.
+    def subscribe(self, fields, interval):
+        for name in fields:
+            if name not in fieldBits:
+                raise ValueError(f"Unknown field: {name}")
+        rates = dict(self.rates)
+        for name in fields:
+            if interval is None:
+                rates[name] = 0
+                self._field_times.pop(name, None)
+            else:
+                rates[name] = interval
+        self.rates = rates
+        self._tracked = tuple((name, fieldBits[name], interval) for name, interval in rates.items() if interval)
+        self._rates_due = True
+
+    # s since the last update of a subscribed field, None before the first one
+    def field_age(self, name, now=None):
+        field_time = self._field_times.get(name)
+        if field_time is None:
+            return None
+        return (now if now is not None else time.monotonic()) - field_time
+
+    def stale_fields(self, now=None):
+        now = now if now is not None else time.monotonic()
+        field_times = self._field_times
+        return [name for name, bit, interval in self._tracked
+                if now - field_times.get(name, float('-inf')) > interval * fieldLateFactor]
+
+    def write(self, data):
+        with self._port_lock:
+            if self._ser is None:
+                return False
+            try:
+                self._ser.write(data)
+                return True
+            except serial.SerialException as e:
+                logging.error(f"Seri port hatası: {e}")
+                self.stats.serial_errors += 1
+                self._close_locked()
+                return False
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self._ser is None:
+                print("Serial port is closed. Trying to open...")
+                logging.warning("Serial port is closed. Trying to open...")
+                if not self._open():
+                    self._backoff()
+                    continue
+                self._select_protocol('binary' if self.protocol_setting == 'binary' else 'ascii')
+
+            if self._binary_pending and time.monotonic() - self._binary_request_time > self.negotiate_timeout:
+                self._request_binary(time.monotonic())
+            if self._uplink_due.is_set():
+                self._uplink_due.clear()
+                if self._talking:
+                    self._send_uplink(time.monotonic())
+            ser = self._ser
+            if ser is None:     # Closed by a failed write
+                continue
+            try:
+                data = ser.read(ser.in_waiting or 1)    # Blocks until the first byte or the read deadline
+            except serial.SerialException as e:
+                logging.error(f"Seri port hatası: {e}")
+                self.stats.serial_errors += 1
+                with self._port_lock:
+                    self._close_locked()
+                self._backoff()
+                continue
+
+            if not data:    # Read deadline passed without a byte
+                if self._uplink_due.is_set():   # Woken by a posted setting
+                    continue
+                if not self._stalled:
+                    print("Serial port is timed out...")
+                    logging.warning("Serial port is timed out...")
+                    self.stats.read_timeouts += 1
+                    self._stalled = True
+                continue
+            self._stalled = False
+            frame_time = time.monotonic()   # Data age is measured from here
+            self.stats.bytes += len(data)
+            ingest_start = time.perf_counter()
+            if self._probe is not None:
+                frames = self._negotiate(data, frame_time)
+            else:
+                self.decoder.feed(data)
+                frames = self.decoder.frames()
+            self.stats.ingest_time += time.perf_counter() - ingest_start
+            if not frames:
+                continue
+            self._keep(frames, frame_time, self.protocol)
+            self.stats.conflated_frames += len(frames) - 1
+            parse_start = time.perf_counter()
+            self._publish(frames, frame_time)
+            self.stats.parse_time += time.perf_counter() - parse_start
+            self.last_frame_time = frame_time
+            self.reconnect_attempts = 0
+            self._talking = True
+            self._binary_pending = False
+            if self.protocol == 'binary' and self.decoder.need_keyframe and frame_time - self._keyframe_request_time > self.uplink.ack_timeout:
+                self.uplink.send_once('kfr', 1)
+                self.stats.keyframe_requests += 1
+                self._keyframe_request_time = frame_time
+            if self._rates_due:
+                self._rates_due = False
+                self.uplink.send_rates(self.rates)
+            self._send_uplink(frame_time)
+            if self._probe is not None and self._probe_deadline is None:
+                self._probe_deadline = frame_time + self.negotiate_timeout
+                self._request_binary(frame_time)
+
+        with self._port_lock:
+            self._close_locked()
+
+    # History and flight recorder
+    def _keep(self, frames, frame_time, protocol):
+        if self.history is not None:
+            self.history.extend((frame_time, frame_lines) for frame_lines in frames)
+        if self.recorder is not None:
+            self.recorder.record(frame_time, protocol, frames)
+
+    def _publish(self, frames, frame_time):
+        back = self._back
+        parse = self.decoder.parse
+        mask = 0
+        for frame in frames:
+            mask |= parse(back, frame)
+        if self._tracked:
+            if self.protocol == 'binary' and not self.decoder.need_keyframe:
+                mask = allFieldsMask    # A delta frame leaves out the fields that did not change
+            self._track_fields(mask, frame_time)
+        back.frame_sequence = self.snapshot.frame_sequence + 1
+        back.frame_time = frame_time
+        self.snapshot = back
+        self._back = back.copy()
+
+    def _track_fields(self, mask, frame_time):
+        field_times = self._field_times
+        for name, bit, interval in self._tracked:
+            if mask & bit:
+                last_time = field_times.get(name)
+                if last_time is not None and frame_time - last_time > interval * fieldLateFactor:
+                    self.stats.late_fields += 1
+                field_times[name] = frame_time
+
+    def _select_protocol(self, protocol):
+        self.protocol = protocol
+        self._talking = False
+        self.decoder = BinaryFrameDecoder(self.stats) if protocol == 'binary' else FrameDecoder(self.stats)
+        self._probe = BinaryFrameDecoder(LinkStats()) if protocol == 'ascii' and self.protocol_setting == 'auto' else None    # Own stats, ASCII data is garbage to it
+        self._probe_deadline = None
+        self._binary_pending = protocol == 'binary'
+        self._binary_request_time = float('-inf')
+        self._rates_due = bool(self.rates)
+        self._field_times = {}
+
+    def _request_binary(self, now):
+        self._binary_request_time = now
+        self.uplink.send_once('bin', 2 if self.delta else 1)
+        self._send_uplink(now)
+
+    # Feeds both decoders during negotiation and returns the frames of the protocol in use. The first
+    # good binary frame switches the link to binary; ASCII frames that came before it in the same read
+    # are kept and published first.
+    def _negotiate(self, data, frame_time):
+        self.decoder.feed(data)
+        ascii_frames = self.decoder.frames()
+        probe = self._probe
+        probe.feed(data)
+        frames = probe.frames()
+        if frames:
+            if ascii_frames:
+                self._keep(ascii_frames, frame_time, 'ascii')
+                self.stats.conflated_frames += len(ascii_frames)     # Superseded by the binary frames
+                self._publish(ascii_frames, frame_time)
+            logging.info("ADU binary protocol active")
+            self.protocol = 'binary'
+            self.decoder = probe
+            probe.stats = self.stats
+            self.stats.frames += len(frames)
+            self._probe = None
+            return frames
+        if self._probe_deadline is not None and time.monotonic() > self._probe_deadline:
+            logging.info("ADU did not answer '!bin=1', staying with ASCII")
+            self._probe = None
+        return ascii_frames
+
+    def _wake_uplink(self):
+        self._uplink_due.set()
+        ser = self._ser
+        if ser is not None and hasattr(ser, 'cancel_read'):
+            try:
+                ser.cancel_read()
+            except (OSError, TypeError):    # Port closed by the reader meanwhile
+                pass
+
+    def _send_uplink(self, now):
+        data = self.uplink.batch(self.snapshot, now)
+        if data is not None:
+            self.write(data)
+
+    # Waits before the next connection attempt, doubling up to reconnect_delay_max. The random factor keeps
+    # retries from locking into step with a device that is re-enumerating.
+    def _backoff(self):
+        delay = min(self.reconnect_delay_max, self.reconnect_delay_min * 2 ** self.reconnect_attempts)
+        self.reconnect_attempts += 1
+        self._stop_event.wait(delay * random.uniform(0.5, 1.0))
+
+    def _open(self):
+        try:
+            ser = self.port_factory(self.port_num, self.baud_rate, timeout=self.read_timeout)   # Port name or URL (socket://...)
+        except (serial.SerialException, ValueError) as e:
+            logging.error(f"Seri port açılamadı: {e}")
+            return False
+        logging.info(f"Seri port {self.baud_rate} başarıyla açıldı.")
+        with self._port_lock:
+            self._ser = ser
+        self.connections += 1
+        return True
+
+    def _close_locked(self):
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+            self._ser = None
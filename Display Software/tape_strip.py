@@ -0,0 +1,75 @@
+# IboSoft EFIS Display Software
+# Pre-rendered tape strips
+#   A TapeStrip is the whole scale of a moving tape (background, division lines and labels) drawn
+#   once on a tall strip, so a frame is one clipped blit of the strip at the offset of the current value.
+#   The strip is cut into segments of 'segment_height' px that are drawn on first use and kept in a
+#   least recently used cache of 'max_segments', so long scales (altitude) use bounded memory.
+#   Tape coordinate: division 'value' is at row -value*px_per_unit, larger values upwards.
+
+# Libraries
+import collections              # Internal
+import math                     # Internal
+import pygame                   # External
+
+# --------------------
+# Strip
+
+class TapeStrip:
+    # 'draw_division(surface, value, y)' draws one division on a segment, 'y' is its row on the segment
+    # and x is relative to the left of 'rect'. 'margin' (px) is how far a division's drawing reaches
+    # above and below its row.
+    def __init__(self, rect, color, value_min, value_max, div_value, px_per_unit, draw_division, margin=16,
+                 segment_height=1024, max_segments=4):
+        self.rect = pygame.Rect(rect)   # Tape window on screen
+        self.color = color              # Background
+        self.value_min = value_min
+        self.value_max = value_max
+        self.div_value = div_value      # Value between divisions
+        self.px_per_unit = px_per_unit
+        self.draw_division = draw_division
+        self.margin = margin
+        self.segment_height = segment_height
+        self.max_segments = max(max_segments, 2)    # A window can span two segments
+        self.segments = collections.OrderedDict()   # Segment index -> surface, least recently used first
+
+    # Blits the tape with 'value' at screen row 'pointer_y'; returns the rectangle drawn
+    def blit(self, dest, value, pointer_y):
+        base = round(pointer_y + value*self.px_per_unit)    # Screen row of tape row 0
+        top = self.rect.top - base                          # Tape rows in the window
+        bottom = self.rect.bottom - base
+        height = self.segment_height
+        sequence = []
+        for index in range(top // height, (bottom - 1) // height + 1):
+            seg_top = max(top, index*height)
+            seg_bottom = min(bottom, (index + 1)*height)
+            area = pygame.Rect(0, seg_top - index*height, self.rect.width, seg_bottom - seg_top)
+            sequence.append((self._segment(index), (self.rect.left, base + seg_top), area))
+        dest.blits(sequence, doreturn=False)
+        return self.rect.copy()
+
+    def _segment(self, index):
+        segment = self.segments.get(index)
+        if segment is not None:
+            self.segments.move_to_end(index)
+            return segment
+        segment = self._render(index)
+        self.segments[index] = segment
+        while len(self.segments) > self.max_segments:
+            self.segments.popitem(last=False)
+        return segment
+
+    def _render(self, index):
+        height = self.segment_height
+        segment = pygame.Surface((self.rect.width, height))
+        if pygame.display.get_surface() is not None:
+            segment = segment.convert()
+        segment.fill(self.color)
+        top = index*height - self.margin          # Tape rows whose divisions can reach the segment
+        bottom = (index + 1)*height + self.margin
+        # Rows decrease with value: row 'top' is the largest value
+        first = max(math.ceil(-bottom/self.px_per_unit/self.div_value), math.ceil(self.value_min/self.div_value))
+        last = min(math.floor(-top/self.px_per_unit/self.div_value), math.floor(self.value_max/self.div_value))
+        for div in range(first, last + 1):
+            value = div*self.div_value
+            self.draw_division(segment, value, round(-value*self.px_per_unit) - index*height)
+        return segment
@@ -0,0 +1,168 @@
+# IboSoft EFIS Display Software
+# ADU telemetry record and field dispatch
+
+# --------------------
+# Converters (values arrive as bytes, float()/int() accept them directly)
+
+def to_bool(value):
+    return bool(int(value))
+
+# --------------------
+# Telemetry Record
+#   Fixed layout record of everything dataOut() sends. This is what the PFD renderer reads.
+#   Records published by the serial reader are snapshots: they are never written after publishing.
+
+class Telemetry:
+    __slots__ = (
+        # Frame
+        'frame_sequence', 'frame_time',
+        # General
+        'messageInterval',
+        # Settings
+        'set_altStd', 'set_altStg',
+        # A/G Sensing
+        'ag_onGnd1', 'ag_onGnd2', 'ag_onGnd3',
+        # AOA
+        'aoa_angle',
+        # Temperature
+        'temp_TATC',
+        # IMU
+        'imuStatus', 'imu_ax', 'imu_ay', 'imu_az', 'imu_gx', 'imu_gy', 'imu_gz',
+        # Magnetometer
+        'magStatus',
+        # Pressure
+        'pressStatus', 'press_pressPa',
+        # Differential Pressure
+        'diffStatus', 'diff_pressPa',
+        # Derived Values
+        'drv_pitch', 'drv_roll', 'drv_turnRate', 'drv_linearAcc', 'drv_magUncorrHdg', 'drv_magCorrHdg',
+        'drv_pressAltFt', 'drv_indAltFt', 'drv_baroVspdFpm', 'drv_kias', 'drv_kcas', 'drv_ktas', 'drv_mach', 'drv_SATC',
+    )
+
+    def __init__(self):
+        # Frame
+        self.frame_sequence = 0     # Published snapshot number, 0 before the first frame
+        self.frame_time = None      # time.monotonic() of the read that completed the frame
+        # General
+        self.messageInterval = 0    # (ms)
+        # Settings
+        self.set_altStd = False
+        self.set_altStg = 101300.0  # (Pa)
+        # A/G Sensing
+        self.ag_onGnd1 = True; self.ag_onGnd2 = True; self.ag_onGnd3 = True
+        # AOA
+        self.aoa_angle = 0.0        # (deg)
+        # Temperature
+        self.temp_TATC = 0.0        # (C)
+        # IMU
+        self.imuStatus = False
+        self.imu_ax = 0.0; self.imu_ay = 0.0; self.imu_az = 0.0     # (g)
+        self.imu_gx = 0.0; self.imu_gy = 0.0; self.imu_gz = 0.0     # (deg/s)
+        # Magnetometer
+        self.magStatus = False
+        # Pressure
+        self.pressStatus = False
+        self.press_pressPa = 0.0    # (Pa)
+        # Differential Pressure
+        self.diffStatus = False
+        self.diff_pressPa = 0.0     # (Pa)
+        # Derived Values
+        self.drv_pitch = 0.0        # Pitch (deg)
+        self.drv_roll = 0.0         # Roll (deg)
+        self.drv_turnRate = 0.0     # Turn Rate (deg/s)
+        self.drv_linearAcc = 0.0    # Linear Acceleration (g)
+        self.drv_magUncorrHdg = 0.0 # (deg)
+        self.drv_magCorrHdg = 0.0   # (deg)
+        self.drv_pressAltFt = 0.0   # Pressure Alt (ft)
+        self.drv_indAltFt = 0.0     # Indicated Alt (ft)
+        self.drv_baroVspdFpm = 0.0  # Vertical Speed (fpm)
+        self.drv_kias = 0.0         # KIAS (kts)
+        self.drv_kcas = 0.0         # KCAS (kts)
+        self.drv_ktas = 0.0         # KTAS (kts)
+        self.drv_mach = 0.0         # Mach (Mach)
+        self.drv_SATC = 0.0         # SAT (C)
+
+    def copy(self):
+        record = Telemetry.__new__(Telemetry)
+        for get_slot, set_slot in slotAccessors:
+            set_slot(record, get_slot(self))
+        return record
+
+    def __repr__(self):
+        return "Telemetry(" + ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__) + ")"
+
+slotAccessors = tuple((getattr(Telemetry, name).__get__, getattr(Telemetry, name).__set__) for name in Telemetry.__slots__)
+
+# --------------------
+# Field Dispatch
+#   Full MCU tag -> (slot descriptor, converter). One dict lookup per line; the slot descriptor
+#   writes straight into the record without an attribute name lookup.
+
+fieldTags = {
+    b'/i': ('messageInterval', int),
+    b'!asd': ('set_altStd', to_bool),
+    b'!atg': ('set_altStg', float),
+    b'$gn1': ('ag_onGnd1', to_bool),
+    b'$gn2': ('ag_onGnd2', to_bool),
+    b'$gn3': ('ag_onGnd3', to_bool),
+    b'$aoa': ('aoa_angle', float),
+    b'$tat': ('temp_TATC', float),
+    b'%imu': ('imuStatus', to_bool),
+    b'$ax': ('imu_ax', float),
+    b'$ay': ('imu_ay', float),
+    b'$az': ('imu_az', float),
+    b'$gx': ('imu_gx', float),
+    b'$gy': ('imu_gy', float),
+    b'$gz': ('imu_gz', float),
+    b'%mag': ('magStatus', to_bool),
+    b'%prs': ('pressStatus', to_bool),
+    b'$prs': ('press_pressPa', float),
+    b'%dif': ('diffStatus', to_bool),
+    b'$dif': ('diff_pressPa', float),
+    b'&pit': ('drv_pitch', float),
+    b'&rol': ('drv_roll', float),
+    b'&trn': ('drv_turnRate', float),
+    b'&lac': ('drv_linearAcc', float),
+    b'&umh': ('drv_magUncorrHdg', float),
+    b'&cmh': ('drv_magCorrHdg', float),
+    b'&plt': ('drv_pressAltFt', float),
+    b'&ilt': ('drv_indAltFt', float),
+    b'&vsp': ('drv_baroVspdFpm', float),
+    b'&ias': ('drv_kias', float),
+    b'&cas': ('drv_kcas', float),
+    b'&tas': ('drv_ktas', float),
+    b'&mac': ('drv_mach', float),
+    b'&sat': ('drv_SATC', float),
+}
+
+# Field n of the table is bit n of a field mask
+fieldBits = {name: 1 << index for index, (name, convert) in enumerate(fieldTags.values())}
+allFieldsMask = (1 << len(fieldTags)) - 1
+
+fieldTable = {tag: (getattr(Telemetry, name).__set__, convert, fieldBits[name]) for tag, (name, convert) in fieldTags.items()}
+
+# Parses one frame (list of b'tag=value' lines) into the record and returns the mask of the fields it
+# set. A malformed line is dropped on its own and the field keeps its previous value; the rest of the
+# frame is still applied. Lines with a well-formed but unknown tag are ignored, the '@' RTC line
+# carries no '='.
+def parse_frame(record, frame_lines, stats):
+    mask = 0
+    for line in frame_lines:
+        tag, separator, value = line.partition(b'=')
+        field = fieldTable.get(tag)
+        if field is None:
+            if not separator and not line.startswith(b'@'):
+                if not line.isascii():
+                    stats.undecodable_bytes += len(line)
+                stats.bad_lines += 1
+            continue
+        set_slot, convert, bit = field
+        try:
+            set_slot(record, convert(value))
+        except ValueError:
+            if not value.isascii():
+                stats.undecodable_bytes += len(line)
+            stats.bad_lines += 1
+            continue
+        mask |= bit
+    return mask